@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from main import analyze_user_evidence_and_strategy
+from case_index import get_case_index
+from store import DEFAULT_STORE_URL, open_store
+
+# Results written to the analysis store per transaction
+STORE_BATCH = 500
+
+
+def read_cases(path):
+    """
+    Read cases from a JSONL or CSV file.
+
+    Each case needs facts, evidence (a list of evidence dicts, JSON-encoded in CSV)
+    and strategy; id, title and type are optional.
+    """
+    if path.endswith(".csv"):
+        records = pd.read_csv(path, dtype=str).fillna("").to_dict("records")
+        for record in records:
+            record["evidence"] = json.loads(record["evidence"]) if record.get("evidence") else []
+        return records
+
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def case_details_from_record(record):
+    return {
+        "title": record.get("title", ""),
+        "type": record.get("type", ""),
+        "facts": record.get("facts", "")
+    }
+
+
+def analyze_record(record):
+    """
+    Analyze a single batch record, capturing errors instead of raising
+    """
+    case_data = case_details_from_record(record)
+    try:
+        result = analyze_user_evidence_and_strategy(case_data, record.get("evidence", []), record.get("strategy", ""))
+        return {"id": record.get("id"), "result": result}
+    except Exception as e:
+        return {"id": record.get("id"), "error": str(e)}
+
+
+def _init_worker():
+    # Load the case index once per worker rather than on the first case
+    get_case_index()
+
+
+def run_batch(records, workers=None, chunksize=None):
+    """
+    Analyze records over a process pool, yielding results in input order
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker()
+        yield from map(analyze_record, records)
+        return
+
+    # Enough chunks per worker to balance load without per-case IPC overhead
+    chunksize = chunksize or max(1, len(records) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        yield from executor.map(analyze_record, records, chunksize=chunksize)
+
+
+def run_gemini_batch(records, args):
+    """
+    Analyze records with Gemini through the async driver
+    """
+    from gemini_async import analyze_cases, StubGeminiModel
+    from response_cache import get_response_cache
+
+    if args.stub:
+        model = StubGeminiModel()
+    else:
+        import google.generativeai as genai
+        genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+        model = genai.GenerativeModel("gemini-pro")
+
+    cases = [{
+        "id": record.get("id"),
+        "case_details": case_details_from_record(record),
+        "evidence": record.get("evidence", []),
+        "strategy": record.get("strategy", "")
+    } for record in records]
+    cache = None if args.no_cache else get_response_cache()
+    return analyze_cases(model, cases, concurrency=args.concurrency, rate=args.rate,
+                         timeout=args.timeout, cache=cache)
+
+
+def store_results(records, rows, store, batch_size=STORE_BATCH):
+    """
+    Pass result rows through, saving successful ones to the analysis store in bulk
+    """
+    pending = []
+    for record, row in zip(records, rows):
+        if "result" in row:
+            pending.append({
+                "case": case_details_from_record(record),
+                "evidence": record.get("evidence", []),
+                "strategy": record.get("strategy", ""),
+                "result": row["result"],
+                "source": row.get("source", "batch")
+            })
+            if len(pending) >= batch_size:
+                store.save_analyses(pending)
+                pending = []
+        yield row
+    if pending:
+        store.save_analyses(pending)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score many cases with the rule-based engine or Gemini")
+    parser.add_argument("input", help="JSONL or CSV file of cases")
+    parser.add_argument("output", help="JSONL file to write results to")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=None, help="Cases sent to a worker at a time")
+    parser.add_argument("--store", nargs="?", const=DEFAULT_STORE_URL, default=None,
+                        help="Also save results to the analysis store (default URL: %(const)s)")
+    gemini = parser.add_argument_group("Gemini mode")
+    gemini.add_argument("--gemini", action="store_true", help="Analyze with Gemini (API key from GEMINI_API_KEY)")
+    gemini.add_argument("--stub", action="store_true", help="Use a local stub model instead of the API")
+    gemini.add_argument("--concurrency", type=int, default=8, help="Requests in flight")
+    gemini.add_argument("--rate", type=float, default=1.0, help="Requests started per second")
+    gemini.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    gemini.add_argument("--no-cache", action="store_true", help="Bypass the response cache")
+    args = parser.parse_args(argv)
+
+    records = read_cases(args.input)
+    start = time.perf_counter()
+    errors = 0
+    if args.gemini or args.stub:
+        rows = run_gemini_batch(records, args)
+    else:
+        rows = run_batch(records, args.workers, args.chunksize)
+    if args.store:
+        rows = store_results(records, rows, open_store(args.store))
+    with open(args.output, "w", encoding="utf-8") as out:
+        for row in rows:
+            errors += "error" in row
+            out.write(json.dumps(row) + "\n")
+    elapsed = time.perf_counter() - start
+
+    rate = len(records) / elapsed if elapsed > 0 else 0.0
+    print(f"Analyzed {len(records)} cases ({errors} errors) in {elapsed:.2f}s - {rate:.1f} cases/sec", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tracemalloc
+
+import numpy as np
+
+import main
+from case_index import CaseIndex, set_case_index
+
+# Default scenario grid
+EVIDENCE_COUNTS = [1, 10, 100]
+STRATEGY_WORDS = [50, 500, 5000]
+CORPUS_SIZES = [1000, 10000]
+
+# A stage regresses if its p50 grows by more than the threshold and by more than NOISE_FLOOR_MS
+DEFAULT_THRESHOLD = 0.25
+NOISE_FLOOR_MS = 0.05
+
+FACT_WORDS = ("contract breach delivery goods damages plaintiff defendant negligence property easement "
+              "boundary policy insurance coverage exclusion malpractice surgical consent ordinance "
+              "constitutional tax exemption trust employment termination discrimination fraud").split()
+STRATEGY_WORDS_POOL = ("procedural motion to dismiss summary judgment jurisdiction substantive merits elements "
+                       "statutory precedent settlement negotiation mediation compromise aggressive challenge "
+                       "counter defensive mitigate limit protect the and of with").split()
+EVIDENCE_DESCRIPTIONS = ["Signed contract between the parties", "Witness statement from site manager",
+                         "Photograph of damaged goods", "Expert report on industry standards",
+                         "Email correspondence about delivery", "Deposition of defendant", "Invoice ledger"]
+OUTCOMES = ["Win at trial", "Favorable settlement", "Loss at trial", "Partially successful", "Dismissed"]
+
+
+def synthetic_evidence(rng, count):
+    return [{
+        "description": rng.choice(EVIDENCE_DESCRIPTIONS),
+        "reliability": rng.randint(1, 5),
+        "relevance": rng.randint(1, 5)
+    } for _ in range(count)]
+
+
+def synthetic_strategy(rng, words):
+    return " ".join(rng.choice(STRATEGY_WORDS_POOL) for _ in range(words))
+
+
+def synthetic_facts(rng, sentences=8):
+    return " ".join(" ".join(rng.choice(FACT_WORDS) for _ in range(12)).capitalize() + "." for _ in range(sentences))
+
+
+def synthetic_corpus(rng, size):
+    return [{
+        "title": f"Synthetic Case {i}",
+        "facts": synthetic_facts(rng, 3),
+        "outcome": rng.choice(OUTCOMES),
+        "evidence_strength": "Synthetic evidence",
+        "strategy_used": synthetic_strategy(rng, 6),
+        "key_factors": [rng.choice(FACT_WORDS) for _ in range(3)]
+    } for i in range(size)]
+
+
+def run_stages(case, evidence, strategy):
+    """
+    Run the analysis pipeline stage by stage, returning per-stage seconds
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    evidence_strength = main.assess_evidence_strength(evidence)
+    timings["assess_evidence_strength"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    strategy_approach = main.categorize_strategy(strategy)
+    timings["categorize_strategy"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    case_facts = main.extract_case_facts(case)
+    timings["extract_case_facts"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    similar_cases = main.find_similar_cases(case_facts)
+    timings["find_similar_cases"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    win_probability = main.calculate_win_probability(similar_cases, evidence_strength, strategy_approach,
+                                                     main.outcome_text(case_facts, strategy))
+    timings["calculate_win_probability"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    main.generate_outcome_analysis(win_probability, similar_cases, evidence_strength, strategy_approach)
+    timings["generate_outcome_analysis"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    main.generate_strategic_recommendations(win_probability, similar_cases, evidence_strength,
+                                            strategy_approach, evidence)
+    timings["generate_strategic_recommendations"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    main.analyze_user_evidence_and_strategy(case, evidence, strategy)
+    timings["analyze_user_evidence_and_strategy"] = time.perf_counter() - start
+    return timings
+
+
+def run_scenario(rng, evidence_count, strategy_words, iterations):
+    """
+    Time every stage over a set of synthetic cases and measure peak memory
+    """
+    cases = [(
+        {"title": "Benchmark case", "type": "Civil", "facts": synthetic_facts(rng)},
+        synthetic_evidence(rng, evidence_count),
+        synthetic_strategy(rng, strategy_words)
+    ) for _ in range(iterations)]
+
+    # Warm-up pass outside the measurements
+    run_stages(*cases[0])
+
+    samples = {}
+    start = time.perf_counter()
+    for case in cases:
+        for stage, seconds in run_stages(*case).items():
+            samples.setdefault(stage, []).append(seconds * 1000)
+    elapsed = time.perf_counter() - start
+
+    # Peak memory in a separate pass, since tracing slows everything down
+    tracemalloc.start()
+    for case in cases[:min(10, len(cases))]:
+        main.analyze_user_evidence_and_strategy(*case)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    full_pipeline = np.array(samples["analyze_user_evidence_and_strategy"])
+    return {
+        "stages": {stage: {
+            "p50_ms": float(np.percentile(values, 50)),
+            "p90_ms": float(np.percentile(values, 90)),
+            "p99_ms": float(np.percentile(values, 99)),
+            "mean_ms": float(np.mean(values))
+        } for stage, values in samples.items()},
+        "throughput_per_sec": float(1000 / full_pipeline.mean()) if full_pipeline.mean() > 0 else 0.0,
+        "wall_seconds": elapsed,
+        "peak_memory_mb": peak / 1e6
+    }
+
+
+def run_benchmarks(evidence_counts, strategy_words, corpus_sizes, iterations, seed=0):
+    """
+    Run the whole scenario grid and return a JSON-serialisable report
+    """
+    rng = random.Random(seed)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": iterations,
+            "seed": seed,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "scenarios": {}
+    }
+    for corpus_size in corpus_sizes:
+        set_case_index(CaseIndex.build(synthetic_corpus(rng, corpus_size)))
+        for evidence_count in evidence_counts:
+            for words in strategy_words:
+                name = f"corpus={corpus_size},evidence={evidence_count},strategy_words={words}"
+                print(f"Running {name}", file=sys.stderr)
+                report["scenarios"][name] = run_scenario(rng, evidence_count, words, iterations)
+    return report
+
+
+def run_ann_benchmark(corpus_sizes, nprobes, seed=0):
+    """
+    Recall of the exact top 5 and latency of ANN against exact search, per
+    corpus size and probe count, plus the operating point calibration chose
+    """
+    rng = random.Random(seed)
+    results = {}
+    for corpus_size in corpus_sizes:
+        print(f"Building ANN index for corpus={corpus_size}", file=sys.stderr)
+        index = CaseIndex.build(synthetic_corpus(rng, corpus_size), ann=True, seed=seed)
+        # Different queries from the ones calibration used
+        queries = index.calibration_queries(seed=seed + 1)
+        n_lists = len(index.ann.centroids)
+        results[str(corpus_size)] = {
+            "lists": n_lists,
+            "calibration": index.ann_calibration,
+            "auto_uses_ann": index.use_ann(),
+            "probes": [index.measure_ann(queries, nprobe) for nprobe in sorted({min(n, n_lists) for n in nprobes})]
+        }
+    return results
+
+
+def print_ann_report(results):
+    for corpus_size, result in results.items():
+        print(f"\nANN vs exact, corpus={corpus_size} ({result['lists']} lists, auto uses "
+              f"{'ANN' if result['auto_uses_ann'] else 'exact'})")
+        for probe in result["probes"]:
+            print(f"  nprobe {probe['nprobe']:5d}  recall {probe['recall']:.2f}  ann {probe['ann_ms']:8.2f}ms  "
+                  f"exact {probe['exact_ms']:8.2f}ms")
+
+
+def find_regressions(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    List stages whose p50 latency or scenario peak memory regressed past the threshold
+    """
+    regressions = []
+    for name, scenario in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        for stage, stats in scenario["stages"].items():
+            base_stats = base["stages"].get(stage)
+            if base_stats is None:
+                continue
+            current, previous = stats["p50_ms"], base_stats["p50_ms"]
+            if current > previous * (1 + threshold) and current - previous > NOISE_FLOOR_MS:
+                regressions.append(f"{name} {stage}: p50 {previous:.3f}ms -> {current:.3f}ms")
+        if scenario["peak_memory_mb"] > base["peak_memory_mb"] * (1 + threshold):
+            regressions.append(f"{name}: peak memory {base['peak_memory_mb']:.1f}MB -> {scenario['peak_memory_mb']:.1f}MB")
+    return regressions
+
+
+def print_report(report):
+    for name, scenario in report["scenarios"].items():
+        print(f"\n{name}  ({scenario['throughput_per_sec']:.1f} analyses/sec, "
+              f"peak {scenario['peak_memory_mb']:.1f}MB)")
+        for stage, stats in scenario["stages"].items():
+            print(f"  {stage:<38} p50 {stats['p50_ms']:8.3f}ms  p90 {stats['p90_ms']:8.3f}ms  "
+                  f"p99 {stats['p99_ms']:8.3f}ms")
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the rule-based analysis pipeline")
+    parser.add_argument("--evidence-counts", type=int, nargs="+", default=EVIDENCE_COUNTS)
+    parser.add_argument("--strategy-words", type=int, nargs="+", default=STRATEGY_WORDS)
+    parser.add_argument("--corpus-sizes", type=int, nargs="+", default=CORPUS_SIZES)
+    parser.add_argument("--iterations", type=int, default=50, help="Cases timed per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a baseline JSON file and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative slowdown before failing (default 0.25)")
+    parser.add_argument("--ann-sizes", type=int, nargs="+", default=[],
+                        help="Also report ANN recall and latency against exact search for these corpus sizes")
+    parser.add_argument("--nprobes", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64, 128, 100000],
+                        help="Probe counts for --ann-sizes (capped at the number of lists)")
+    parser.add_argument("--skip-golden", action="store_true",
+                        help="Do not check the golden outputs before timing")
+    args = parser.parse_args(argv)
+
+    # Timings are only comparable if the pipeline still produces the same results
+    if not args.skip_golden:
+        from golden import check_golden
+        mismatches = check_golden()
+        if mismatches:
+            print(f"Analysis outputs differ from the golden outputs ({len(mismatches)} differences), e.g.:")
+            for mismatch in mismatches[:5]:
+                print(f"  {mismatch}")
+            return 2
+
+    report = run_benchmarks(args.evidence_counts, args.strategy_words, args.corpus_sizes,
+                            args.iterations, args.seed)
+    print_report(report)
+    if args.ann_sizes:
+        report["ann"] = run_ann_benchmark(args.ann_sizes, args.nprobes, args.seed)
+        print_ann_report(report["ann"])
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline, args.threshold)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
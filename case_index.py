@@ -0,0 +1,615 @@
+import os
+import json
+import time
+import random
+import numpy as np
+import joblib
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from keywords import OUTCOME_MATCHER
+
+# Location of the prebuilt case index (override with CASE_INDEX_PATH)
+DEFAULT_INDEX_PATH = os.environ.get("CASE_INDEX_PATH", os.path.join("data", "case_index"))
+
+# Metadata fields kept for every case in the index
+CASE_FIELDS = ["title", "facts", "outcome", "evidence_strength", "strategy_used", "key_factors"]
+LIST_FIELDS = {"key_factors"}
+
+# On-disk layout version written to meta.json
+INDEX_FORMAT_VERSION = 1
+
+# Outcome flag bits, one per OUTCOME_KEYWORDS category
+OUTCOME_WIN, OUTCOME_FAVORABLE, OUTCOME_SUCCESS, OUTCOME_LOSS, OUTCOME_UNFAVORABLE = 1, 2, 4, 8, 16
+OUTCOME_POSITIVE = OUTCOME_WIN | OUTCOME_FAVORABLE | OUTCOME_SUCCESS
+
+# Approximate search settings. ANN_NPROBE (inverted lists scanned per query) is
+# the recall-vs-latency knob for explicit "ann" searches; each probed list
+# contributes ANN_CANDIDATES_PER_PROBE candidates to the exact re-scoring, which
+# on the benchmark corpus keeps the recall of re-scoring the probed lists in full.
+ANN_NPROBE = int(os.environ.get("CASE_INDEX_NPROBE", 8))
+ANN_CANDIDATES_PER_PROBE = 25
+
+# "auto" searches only use the ANN index where calibration at build time measured
+# it reaching this recall of the exact top-k faster than an exact scan
+ANN_TARGET_RECALL = float(os.environ.get("CASE_INDEX_ANN_RECALL", 0.95))
+CALIBRATION_QUERIES = 50
+
+# Built-in sample corpus, used when no prebuilt index is available
+SAMPLE_CASES = [
+    {
+        "title": "Smith v. Johnson (2020)",
+        "facts": "Plaintiff alleged breach of contract when defendant failed to deliver goods on time.",
+        "outcome": "Favorable settlement",
+        "evidence_strength": "Strong documentary evidence",
+        "strategy_used": "Focus on contract terms and damages",
+        "key_factors": ["Clear contract terms", "Documented timeline", "Quantifiable damages"]
+    },
+    {
+        "title": "Williams v. City Council (2019)",
+        "facts": "Challenge to municipal ordinance on constitutional grounds.",
+        "outcome": "Partially successful",
+        "evidence_strength": "Mixed precedent support",
+        "strategy_used": "Constitutional rights approach",
+        "key_factors": ["Procedural due process", "Similar precedent cases", "Expert testimony"]
+    },
+    {
+        "title": "Estate of Roberts v. Medical Center (2021)",
+        "facts": "Medical malpractice claim related to surgical complications.",
+        "outcome": "Loss at trial",
+        "evidence_strength": "Contradictory expert testimony",
+        "strategy_used": "Technical medical arguments",
+        "key_factors": ["Conflicting expert opinions", "Pre-existing conditions", "Informed consent documentation"]
+    },
+    {
+        "title": "Thompson v. Insurance Co. (2022)",
+        "facts": "Denial of coverage claim based on policy exclusion.",
+        "outcome": "Win through summary judgment",
+        "evidence_strength": "Clear policy documentation",
+        "strategy_used": "Strict policy interpretation",
+        "key_factors": ["Policy language clarity", "Industry standards", "Documented communications"]
+    },
+    {
+        "title": "Garcia Family Trust v. Developer (2021)",
+        "facts": "Property dispute over easement rights and boundary lines.",
+        "outcome": "Settlement after discovery",
+        "evidence_strength": "Historical survey evidence",
+        "strategy_used": "Historical documentation approach",
+        "key_factors": ["Survey records", "Witness testimony", "Pattern of use"]
+    }
+]
+
+
+def case_document(case):
+    """
+    Build the text that represents a case in the index
+    """
+    return " ".join([
+        case.get("title", ""),
+        case.get("facts", ""),
+        case.get("strategy_used", ""),
+        " ".join(case.get("key_factors", []))
+    ])
+
+
+def load_corpus(path):
+    """
+    Load a case corpus from a JSONL file (one case dict per line)
+    """
+    cases = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                case = json.loads(line)
+                cases.append({field: case.get(field, [] if field in LIST_FIELDS else "") for field in CASE_FIELDS})
+    return cases
+
+
+class StringColumn:
+    """
+    Column of strings stored as one UTF-8 byte buffer plus int64 offsets
+    """
+
+    def __init__(self, offsets, buffer):
+        self.offsets = offsets
+        self.buffer = buffer
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.buffer[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    @classmethod
+    def from_values(cls, values):
+        encoded = [value.encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(offsets, buffer)
+
+    def save(self, path, name):
+        np.save(os.path.join(path, f"{name}.offsets.npy"), self.offsets)
+        np.save(os.path.join(path, f"{name}.data.npy"), self.buffer)
+
+    @classmethod
+    def load(cls, path, name, mmap_mode="r"):
+        offsets = np.load(os.path.join(path, f"{name}.offsets.npy"), mmap_mode=mmap_mode)
+        buffer = np.load(os.path.join(path, f"{name}.data.npy"), mmap_mode=mmap_mode)
+        return cls(offsets, buffer)
+
+
+class ListColumn:
+    """
+    Column of string lists: per-row offsets into a flat StringColumn
+    """
+
+    def __init__(self, offsets, values):
+        self.offsets = offsets
+        self.values = values
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return [self.values[j] for j in range(self.offsets[i], self.offsets[i + 1])]
+
+    @classmethod
+    def from_values(cls, rows):
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in rows], out=offsets[1:])
+        values = StringColumn.from_values([value for row in rows for value in row])
+        return cls(offsets, values)
+
+    def save(self, path, name):
+        np.save(os.path.join(path, f"{name}.rows.npy"), self.offsets)
+        self.values.save(path, name)
+
+    @classmethod
+    def load(cls, path, name, mmap_mode="r"):
+        offsets = np.load(os.path.join(path, f"{name}.rows.npy"), mmap_mode=mmap_mode)
+        return cls(offsets, StringColumn.load(path, name, mmap_mode))
+
+
+def outcome_flags(outcome):
+    """
+    Bitmask of the OUTCOME_* terms that appear in an outcome description
+    """
+    counts = OUTCOME_MATCHER.counts(outcome)
+    return sum(1 << bit for bit, count in enumerate(counts.values()) if count)
+
+
+class CaseFeatures:
+    """
+    Derived per-case features, computed once when the index is built:
+
+    outcome: uint8 OUTCOME_* bitmask from the outcome text
+    """
+
+    def __init__(self, outcome):
+        self.outcome = outcome
+
+    @classmethod
+    def from_cases(cls, cases):
+        return cls(np.asarray([outcome_flags(case.get("outcome", "")) for case in cases], dtype=np.uint8))
+
+    def save(self, path):
+        np.save(os.path.join(path, "features.outcome.npy"), self.outcome)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        return cls(np.load(os.path.join(path, "features.outcome.npy"), mmap_mode=mmap_mode))
+
+
+class IndexedCase(dict):
+    """
+    A case returned from the index. Its position and precomputed outcome
+    flags are attributes rather than keys, so it serialises exactly like the
+    plain case dict.
+    """
+
+    __slots__ = ("position", "outcome_flags")
+
+
+class CaseTable:
+    """
+    Columnar case metadata. Rows are materialised as dicts only when accessed,
+    so a memory-mapped table costs nothing until a case is actually returned.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns["title"])
+
+    def __getitem__(self, i):
+        return {field: self.columns[field][i] for field in CASE_FIELDS}
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @classmethod
+    def from_cases(cls, cases):
+        columns = {}
+        for field in CASE_FIELDS:
+            if field in LIST_FIELDS:
+                columns[field] = ListColumn.from_values([list(case.get(field, [])) for case in cases])
+            else:
+                columns[field] = StringColumn.from_values([str(case.get(field, "")) for case in cases])
+        return cls(columns)
+
+    def save(self, path):
+        for field, column in self.columns.items():
+            column.save(path, field)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        columns = {}
+        for field in CASE_FIELDS:
+            column_type = ListColumn if field in LIST_FIELDS else StringColumn
+            columns[field] = column_type.load(path, field, mmap_mode)
+        return cls(columns)
+
+
+def _normalize_rows(matrix):
+    """
+    L2-normalise the rows of a dense matrix in place
+    """
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    matrix /= norms
+    return matrix
+
+
+class AnnIndex:
+    """
+    Approximate nearest-neighbour index over LSA embeddings.
+
+    Cases are projected to a dense space with truncated SVD and partitioned
+    into inverted lists by spherical k-means (IVF). A query only scores the
+    cases in its nprobe closest lists, so more probes means better recall at
+    the cost of latency.
+    """
+
+    def __init__(self, components, embeddings, centroids, list_offsets, list_members):
+        self.components = components
+        self.embeddings = embeddings
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_members = list_members
+
+    @classmethod
+    def build(cls, matrix, n_components=256, n_lists=None, iterations=10, seed=0):
+        """
+        Fit the SVD projection and the coarse quantizer for a term matrix
+        """
+        from sklearn.decomposition import TruncatedSVD
+
+        n_cases = matrix.shape[0]
+        n_components = max(1, min(n_components, matrix.shape[1] - 1, n_cases - 1))
+        svd = TruncatedSVD(n_components=n_components, random_state=seed)
+        embeddings = _normalize_rows(svd.fit_transform(matrix).astype(np.float32))
+        components = svd.components_.astype(np.float32)
+
+        # Spherical k-means with a fixed seed so rebuilds are reproducible
+        n_lists = n_lists or max(1, int(np.sqrt(n_cases)))
+        rng = np.random.default_rng(seed)
+        centroids = embeddings[rng.choice(n_cases, size=min(n_lists, n_cases), replace=False)].copy()
+        for _ in range(iterations):
+            assignment = cls._assign(embeddings, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, embeddings)
+            filled = np.bincount(assignment, minlength=len(centroids)) > 0
+            centroids[filled] = _normalize_rows(sums[filled])
+        assignment = cls._assign(embeddings, centroids)
+
+        list_members = np.argsort(assignment, kind="stable").astype(np.int64)
+        list_offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=len(centroids)), out=list_offsets[1:])
+        return cls(components, embeddings, centroids, list_offsets, list_members)
+
+    @staticmethod
+    def _assign(embeddings, centroids, chunk_size=65536):
+        """
+        Nearest centroid for every embedding, computed in chunks to bound memory
+        """
+        assignment = np.empty(len(embeddings), dtype=np.int64)
+        for start in range(0, len(embeddings), chunk_size):
+            block = embeddings[start:start + chunk_size]
+            assignment[start:start + chunk_size] = np.argmax(block @ centroids.T, axis=1)
+        return assignment
+
+    def save(self, path):
+        for name in ("components", "embeddings", "centroids", "list_offsets", "list_members"):
+            np.save(os.path.join(path, f"ann.{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        arrays = [np.load(os.path.join(path, f"ann.{name}.npy"), mmap_mode=mmap_mode)
+                  for name in ("components", "embeddings", "centroids", "list_offsets", "list_members")]
+        return cls(*arrays)
+
+    def candidates(self, query, nprobe=ANN_NPROBE, n_candidates=None):
+        """
+        Corpus positions of the best candidates for a sparse TF-IDF query, sorted.
+        By default the candidate count grows with nprobe.
+        """
+        n_candidates = n_candidates or ANN_CANDIDATES_PER_PROBE * nprobe
+        embedded = np.asarray(query @ self.components.T, dtype=np.float32).ravel()
+        norm = np.linalg.norm(embedded)
+        if norm == 0:
+            return np.empty(0, dtype=np.int64)
+        embedded /= norm
+
+        probed = top_k_positions(self.centroids @ embedded, nprobe)
+        members = np.concatenate([self.list_members[self.list_offsets[i]:self.list_offsets[i + 1]]
+                                  for i, _ in probed])
+        members.sort()
+        best = top_k_positions(self.embeddings[members] @ embedded, n_candidates)
+        return np.sort(members[[i for i, _ in best]])
+
+
+class CaseIndex:
+    """
+    TF-IDF index over a case corpus.
+
+    The vectorizer is fitted once and the corpus is stored as an L2-normalised
+    CSR matrix, so cosine similarity for a query is a single sparse mat-vec.
+    On disk the CSR arrays and metadata columns are plain .npy files, which
+    load() memory-maps so every worker process shares the OS page cache.
+    An optional AnnIndex serves approximate lookups over very large corpora.
+    """
+
+    def __init__(self, vectorizer, matrix, cases, ann=None, features=None, ann_calibration=None):
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.cases = cases
+        self.ann = ann
+        # Measured ANN operating point for "auto" searches (see calibrate_ann)
+        self.ann_calibration = ann_calibration
+        # Indexes saved before features existed derive them on load
+        self.features = features if features is not None else CaseFeatures.from_cases(cases)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    @classmethod
+    def build(cls, cases, max_features=200000, ann=False, seed=0):
+        """
+        Fit the vectorizer over the corpus and build the term matrix.
+        With ann=True an approximate index is built as well; seed fixes its
+        projection and clustering, so rebuilding the same corpus gives the
+        same index.
+        """
+        vectorizer = TfidfVectorizer(
+            stop_words="english",
+            sublinear_tf=True,
+            ngram_range=(1, 2),
+            min_df=1,
+            max_features=max_features,
+            dtype=np.float32
+        )
+        matrix = sparse.csr_matrix(vectorizer.fit_transform([case_document(case) for case in cases]), dtype=np.float32)
+        ann_index = AnnIndex.build(matrix, seed=seed) if ann else None
+        index = cls(vectorizer, matrix, CaseTable.from_cases(cases), ann_index, CaseFeatures.from_cases(cases))
+        if ann:
+            index.calibrate_ann(seed=seed)
+        return index
+
+    def save(self, path):
+        """
+        Persist the index to a directory of .npy columns
+        """
+        os.makedirs(path, exist_ok=True)
+        joblib.dump(self.vectorizer, os.path.join(path, "vectorizer.joblib"))
+        np.save(os.path.join(path, "matrix.data.npy"), self.matrix.data)
+        np.save(os.path.join(path, "matrix.indices.npy"), self.matrix.indices)
+        np.save(os.path.join(path, "matrix.indptr.npy"), self.matrix.indptr)
+        self.cases.save(path)
+        self.features.save(path)
+        if self.ann is not None:
+            self.ann.save(path)
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": INDEX_FORMAT_VERSION,
+                "shape": list(self.matrix.shape),
+                "ann": self.ann is not None,
+                "ann_calibration": self.ann_calibration,
+                "features": True
+            }, f)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """
+        Load an index previously written by save().
+
+        With mmap_mode="r" nothing proportional to the corpus is read up front;
+        pages are faulted in on demand and shared between processes.
+        """
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported case index format version: {meta.get('version')}")
+
+        vectorizer = joblib.load(os.path.join(path, "vectorizer.joblib"))
+        arrays = [np.load(os.path.join(path, f"matrix.{name}.npy"), mmap_mode=mmap_mode)
+                  for name in ("data", "indices", "indptr")]
+        matrix = sparse.csr_matrix(tuple(arrays), shape=tuple(meta["shape"]), copy=False)
+        ann_index = AnnIndex.load(path, mmap_mode) if meta.get("ann") else None
+        features = CaseFeatures.load(path, mmap_mode) if meta.get("features") else None
+        return cls(vectorizer, matrix, CaseTable.load(path, mmap_mode), ann_index, features,
+                   meta.get("ann_calibration"))
+
+    def case(self, position):
+        """
+        The case at a corpus position, with its precomputed outcome flags
+        """
+        case = IndexedCase((field, self.cases.columns[field][position]) for field in CASE_FIELDS)
+        case.position = position
+        case.outcome_flags = int(self.features.outcome[position])
+        return case
+
+    def scores(self, query_text):
+        """
+        Cosine similarity of the query against every case in the index
+        """
+        query = self.vectorizer.transform([query_text])
+        return self.matrix @ query.toarray().ravel()
+
+    def use_ann(self, mode="auto"):
+        """
+        Decide whether a search in the given mode goes through the ANN index
+        """
+        if mode == "exact" or self.ann is None:
+            return False
+        if mode == "ann":
+            return True
+        calibration = self.ann_calibration
+        return bool(calibration and calibration["nprobe"] and calibration["ann_ms"] < calibration["exact_ms"])
+
+    def calibration_queries(self, count=CALIBRATION_QUERIES, seed=0):
+        """
+        Sample queries from the corpus: the first half of randomly chosen case facts
+        """
+        rng = random.Random(seed)
+        facts = self.cases.columns["facts"]
+        positions = rng.sample(range(len(self)), min(count, len(self)))
+        return [" ".join(str(facts[i]).split()[:max(1, len(str(facts[i]).split()) // 2)]) for i in positions]
+
+    def measure_ann(self, queries, nprobe, top_k=5):
+        """
+        Recall of the exact top_k and mean latencies (ms) of ANN and exact search for queries
+        """
+        start = time.perf_counter()
+        exact = [self.search(query, top_k, mode="exact") for query in queries]
+        exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        start = time.perf_counter()
+        approximate = [self.search(query, top_k, mode="ann", nprobe=nprobe) for query in queries]
+        ann_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        # A result counts as found if it scores at least as high as the exact k-th result (ties included)
+        found = total = 0
+        for exact_results, ann_results in zip(exact, approximate):
+            if not exact_results:
+                continue
+            threshold = exact_results[-1][1] - 1e-9
+            found += sum(score >= threshold for _, score in ann_results)
+            total += len(exact_results)
+        return {"nprobe": nprobe, "recall": found / total if total else 1.0, "ann_ms": ann_ms, "exact_ms": exact_ms}
+
+    def calibrate_ann(self, queries=None, target_recall=ANN_TARGET_RECALL, seed=0):
+        """
+        Find the fewest probes that reach target_recall and record whether ANN
+        is faster than an exact scan at that point. Probes double from 1 and
+        stop once ANN is slower than the exact scan, since more probes only cost more.
+        """
+        queries = queries or self.calibration_queries(seed=seed)
+        calibration = {"nprobe": None, "recall": 0.0, "ann_ms": None, "exact_ms": None,
+                       "target_recall": target_recall}
+        n_lists = len(self.ann.centroids)
+        nprobe = 1
+        while True:
+            measured = self.measure_ann(queries, nprobe)
+            calibration["exact_ms"] = measured["exact_ms"]
+            if measured["recall"] >= target_recall:
+                calibration.update(measured)
+                break
+            if measured["ann_ms"] >= measured["exact_ms"] or nprobe == n_lists:
+                break
+            nprobe = min(nprobe * 2, n_lists)
+        self.ann_calibration = calibration
+        return calibration
+
+    def search(self, query_text, top_k=5, mode="auto", nprobe=None):
+        """
+        Return (case_position, similarity) pairs for the top_k most similar cases.
+
+        mode is "exact", "ann" or "auto" (ANN only where calibration measured
+        it faster at the target recall). ANN candidates are re-scored with
+        exact cosine similarity, so both modes report comparable scores. Ties
+        are broken by corpus position so results are deterministic.
+        """
+        if not self.use_ann(mode):
+            return top_k_positions(self.scores(query_text), top_k)
+
+        if nprobe is None:
+            nprobe = self.ann_calibration["nprobe"] if mode == "auto" else ANN_NPROBE
+        query = self.vectorizer.transform([query_text])
+        candidates = self.ann.candidates(query, nprobe, max(ANN_CANDIDATES_PER_PROBE * nprobe, top_k))
+        if len(candidates) == 0:
+            return top_k_positions(self.matrix @ query.toarray().ravel(), top_k)
+        scores = self.matrix[candidates] @ query.toarray().ravel()
+        return [(int(candidates[i]), score) for i, score in top_k_positions(scores, top_k)]
+
+
+def top_k_positions(scores, top_k):
+    """
+    Select the top_k highest scores, breaking ties by position
+    """
+    n = len(scores)
+    if n == 0 or top_k <= 0:
+        return []
+    top_k = min(top_k, n)
+
+    # Partial selection, then keep everything tied with the k-th score
+    if top_k < n:
+        threshold = np.partition(scores, n - top_k)[n - top_k]
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(n)
+
+    order = np.lexsort((candidates, -scores[candidates]))[:top_k]
+    return [(int(candidates[i]), float(scores[candidates[i]])) for i in order]
+
+
+_default_index = None
+
+
+def get_case_index(path=None):
+    """
+    Return the process-wide case index, loading or building it on first use
+    """
+    global _default_index
+    if _default_index is None or path is not None:
+        path = path or DEFAULT_INDEX_PATH
+        if os.path.isfile(os.path.join(path, "meta.json")):
+            _default_index = CaseIndex.load(path)
+        else:
+            _default_index = CaseIndex.build(SAMPLE_CASES)
+    return _default_index
+
+
+def set_case_index(index):
+    """
+    Replace the process-wide case index (e.g. with one built in memory)
+    """
+    global _default_index
+    _default_index = index
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the similar-case index from a JSONL corpus")
+    parser.add_argument("corpus", help="JSONL file with one case per line")
+    parser.add_argument("output_dir", nargs="?", default=DEFAULT_INDEX_PATH)
+    parser.add_argument("--ann", action="store_true", help="Also build the approximate nearest-neighbour index")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the approximate index (default 0)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    index = CaseIndex.build(corpus, ann=args.ann, seed=args.seed)
+    index.save(args.output_dir)
+    print(f"Indexed {len(index)} cases with {len(index.vectorizer.vocabulary_)} terms into {args.output_dir}")
+    calibration = index.ann_calibration
+    if calibration:
+        if calibration["nprobe"] is None:
+            print(f"ANN did not reach {calibration['target_recall']:.0%} recall before an exact scan "
+                  f"({calibration['exact_ms']:.2f} ms) was faster; auto searches stay exact")
+        else:
+            print(f"ANN: nprobe {calibration['nprobe']} gives {calibration['recall']:.0%} recall in "
+                  f"{calibration['ann_ms']:.2f} ms vs {calibration['exact_ms']:.2f} ms exact; auto searches "
+                  f"use {'ANN' if index.use_ann() else 'exact'}")
@@ -0,0 +1,173 @@
+import time
+import random
+import asyncio
+
+from main import build_gemini_prompt, parse_gemini_response, analyze_user_evidence_and_strategy
+from prompt_builder import RESPONSE_SCHEMA
+from response_cache import cache_key
+
+# Defaults for bulk Gemini runs
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 1.0  # requests per second
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF = 1.0
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter: refills rate tokens per second up to capacity
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def is_quota_error(error):
+    """
+    True for rate-limit / quota errors that are worth retrying
+    """
+    name = type(error).__name__
+    message = str(error).lower()
+    return name in ("ResourceExhausted", "TooManyRequests") or "429" in message or "quota" in message
+
+
+async def _generate(model, prompt):
+    """
+    Call the model without blocking the event loop
+    """
+    if hasattr(model, "generate_content_async"):
+        return await model.generate_content_async(prompt)
+    return await asyncio.to_thread(model.generate_content, prompt)
+
+
+async def rule_analysis_in_thread(case_details, evidence, strategy):
+    """
+    Run the rule-based analysis without blocking the event loop
+    """
+    return await asyncio.to_thread(analyze_user_evidence_and_strategy, case_details, evidence, strategy)
+
+
+async def analyze_case_async(model, case, limiter, semaphore, timeout=DEFAULT_TIMEOUT,
+                             max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF, cache=None,
+                             rule_analysis=rule_analysis_in_thread):
+    """
+    Analyze one case with Gemini, retrying quota errors with exponential backoff.
+
+    case is a dict with case_details, evidence and strategy. Returns a dict
+    with the result and its source ("cache", "gemini" or "fallback").
+    rule_analysis is the coroutine function that supplies the rule-based
+    sections for partial or failed replies (e.g. through a process pool).
+    """
+    case_details = case["case_details"]
+    evidence = case.get("evidence", [])
+    strategy = case.get("strategy", "")
+
+    key = None
+    if cache is not None:
+        key = cache_key(case_details, evidence, strategy, getattr(model, "model_name", ""))
+        cached = cache.get(key)
+        if cached is not None:
+            return {"id": case.get("id"), "source": "cache", "result": cached}
+
+    prompt = build_gemini_prompt(case_details, evidence, strategy)
+    result = error = None
+    for attempt in range(max_retries + 1):
+        try:
+            async with semaphore:
+                await limiter.acquire()
+                response = await asyncio.wait_for(_generate(model, prompt), timeout)
+            result = parse_gemini_response(response.text)
+            break
+        except Exception as e:
+            error = e
+            if not is_quota_error(e) or attempt == max_retries:
+                break
+            # Exponential backoff with jitter, outside the concurrency slot
+            await asyncio.sleep(backoff * (2 ** attempt) * (1 + random.random()))
+
+    if result is None:
+        # Fall back to the rule-based analysis
+        result = await rule_analysis(case_details, evidence, strategy)
+        return {"id": case.get("id"), "source": "fallback", "error": f"{type(error).__name__}: {error}",
+                "result": result}
+    if len(result) == len(RESPONSE_SCHEMA):
+        if cache is not None:
+            cache.put(key, result)
+        return {"id": case.get("id"), "source": "gemini", "result": result}
+
+    # Keep the usable part of a partial reply and fill in the rest
+    filled = [section for section in RESPONSE_SCHEMA if section not in result]
+    fallback = await rule_analysis(case_details, evidence, strategy)
+    result = dict(result, **{section: fallback[section] for section in filled})
+    return {"id": case.get("id"), "source": "gemini", "filled_sections": filled, "result": result}
+
+
+async def analyze_cases_async(model, cases, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE,
+                              timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                              backoff=DEFAULT_BACKOFF, cache=None):
+    """
+    Analyze many cases with up to `concurrency` Gemini requests in flight,
+    started no faster than `rate` per second. Results keep input order.
+    """
+    limiter = TokenBucket(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [
+        analyze_case_async(model, case, limiter, semaphore, timeout, max_retries, backoff, cache)
+        for case in cases
+    ]
+    return await asyncio.gather(*tasks)
+
+
+def analyze_cases(model, cases, **kwargs):
+    """
+    Synchronous wrapper around analyze_cases_async
+    """
+    return asyncio.run(analyze_cases_async(model, cases, **kwargs))
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubGeminiModel:
+    """
+    Local stand-in for genai.GenerativeModel that simulates latency, quota
+    errors and failures, for exercising the driver without API calls
+    """
+
+    model_name = "models/stub"
+
+    def __init__(self, latency=0.2, quota_error_rate=0.1, error_rate=0.05, seed=0):
+        self.latency = latency
+        self.quota_error_rate = quota_error_rate
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.latency * (0.5 + self.random.random()))
+        roll = self.random.random()
+        if roll < self.quota_error_rate:
+            raise RuntimeError("429 Resource has been exhausted (e.g. check quota).")
+        if roll < self.quota_error_rate + self.error_rate:
+            raise RuntimeError("500 Internal error")
+        return StubResponse('{"win_probability": {"win_probability": 50.0, "base_case_probability": 50.0, '
+                            '"evidence_contribution": 0.0, "strategy_contribution": 0.0}}')
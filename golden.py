@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import random
+import argparse
+from contextlib import contextmanager
+
+import numpy as np
+
+import main
+from benchmark import synthetic_corpus, synthetic_evidence, synthetic_facts, synthetic_strategy
+from case_index import SAMPLE_CASES, CaseIndex, get_case_index, set_case_index
+from outcome_model import get_outcome_model, set_outcome_model
+
+# Golden inputs and expected outputs of the rule-based analysis
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "golden")
+CASES_FILE = "cases.jsonl"
+EXPECTED_FILE = "expected.jsonl"
+
+# Floats may differ by this much (BLAS summation order) without counting as a change
+TOLERANCE = 1e-6
+
+EDGE_CASES = [
+    {
+        "id": "no-evidence",
+        "title": "Empty portfolio",
+        "type": "Civil",
+        "facts": "The plaintiff alleges breach of contract. No documents have been produced yet.",
+        "evidence": [],
+        "strategy": "Negotiate a settlement before discovery."
+    },
+    {
+        "id": "undefined-strategy",
+        "title": "Unclear strategy",
+        "type": "Tax",
+        "facts": "The taxpayer claimed a charitable exemption that the authority denied.",
+        "evidence": [{"description": "Tax return for 2021", "reliability": 4, "relevance": 5}],
+        "strategy": "We will see what happens."
+    },
+    {
+        "id": "citations",
+        "title": "Smith v. Jones Corp.",
+        "type": "Civil",
+        "facts": ("In Smith v. Jones Corp., 123 F. Supp. 2d 456 (S.D.N.Y. 2001), the court held the carrier "
+                  "liable. See also 42 U.S.C. § 1983. The defendant, Dr. J. R. Brown, disputes causation.\n\n"
+                  "Goods were damaged in transit on Jan. 5. The invoice (Exhibit A) shows the agreed price."),
+        "evidence": [
+            {"description": "Expert report on surgical standards", "reliability": 5, "relevance": 5},
+            {"description": "Witness testimony from the driver", "reliability": 2, "relevance": 4},
+            {"description": "Photograph of the damaged pallet", "reliability": 3, "relevance": 3}
+        ],
+        "strategy": "File a motion to dismiss on jurisdiction, then argue the substantive merits aggressively."
+    }
+]
+
+
+@contextmanager
+def pinned_engine():
+    """
+    Run with the built-in sample index and the hand-tuned formula, whatever
+    index or trained model this installation has, restoring them afterwards
+    """
+    index, model = get_case_index(), get_outcome_model()
+    set_case_index(CaseIndex.build(SAMPLE_CASES))
+    set_outcome_model(None)
+    try:
+        yield
+    finally:
+        set_case_index(index)
+        set_outcome_model(model)
+
+
+def golden_cases(count=40, seed=0):
+    """
+    The edge cases plus seeded synthetic cases
+    """
+    rng = random.Random(seed)
+    cases = [dict(case) for case in EDGE_CASES]
+    for i in range(count):
+        cases.append({
+            "id": f"synthetic-{i}",
+            "title": f"Synthetic case {i}",
+            "type": "Civil",
+            "facts": synthetic_facts(rng, rng.randint(1, 12)),
+            "evidence": synthetic_evidence(rng, rng.randint(1, 12)),
+            "strategy": synthetic_strategy(rng, rng.randint(5, 80))
+        })
+    return cases
+
+
+def analyze_case(case):
+    case_data = {"title": case["title"], "type": case["type"], "facts": case["facts"]}
+    return main.analyze_user_evidence_and_strategy(case_data, case["evidence"], case["strategy"])
+
+
+def compare(expected, actual, path="result"):
+    """
+    List the differences between two results, allowing TOLERANCE on floats
+    """
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        differences = []
+        for key in expected.keys() | actual.keys():
+            if key not in actual or key not in expected:
+                differences.append(f"{path}.{key}: only in {'expected' if key in expected else 'actual'}")
+            else:
+                differences.extend(compare(expected[key], actual[key], f"{path}.{key}"))
+        return differences
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [f"{path}: {len(expected)} items expected, got {len(actual)}"]
+        differences = []
+        for i, (expected_item, actual_item) in enumerate(zip(expected, actual)):
+            differences.extend(compare(expected_item, actual_item, f"{path}[{i}]"))
+        return differences
+    if (isinstance(expected, (int, float)) and isinstance(actual, (int, float))
+            and not isinstance(expected, bool) and not isinstance(actual, bool)):
+        if abs(expected - actual) <= TOLERANCE:
+            return []
+    elif expected == actual:
+        return []
+    return [f"{path}: expected {expected!r}, got {actual!r}"]
+
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def update_golden(directory=GOLDEN_DIR, count=40, seed=0):
+    """
+    Regenerate the golden inputs and record the current outputs as expected
+    """
+    cases = golden_cases(count, seed)
+    os.makedirs(directory, exist_ok=True)
+    with pinned_engine():
+        expected = [{"id": case["id"], "result": analyze_case(case)} for case in cases]
+    with open(os.path.join(directory, CASES_FILE), "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(case, sort_keys=True) + "\n" for case in cases)
+    with open(os.path.join(directory, EXPECTED_FILE), "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(row, sort_keys=True) + "\n" for row in expected)
+    return len(cases)
+
+
+def check_golden(directory=GOLDEN_DIR):
+    """
+    Re-run the golden cases twice and list every difference from the
+    expected outputs or between the two runs
+    """
+    cases = _read_jsonl(os.path.join(directory, CASES_FILE))
+    expected = {row["id"]: row["result"] for row in _read_jsonl(os.path.join(directory, EXPECTED_FILE))}
+    mismatches = []
+    with pinned_engine():
+        for case in cases:
+            # Round-trip through JSON so tuples and numpy scalars compare as stored
+            first = json.loads(json.dumps(analyze_case(case)))
+            second = json.loads(json.dumps(analyze_case(case)))
+            mismatches.extend(f"{case['id']} (rerun) {difference}" for difference in compare(first, second))
+            mismatches.extend(f"{case['id']} {difference}" for difference in compare(expected[case["id"]], first))
+    return mismatches
+
+
+def check_ann_reproducible(size=3000, seed=0, queries=20):
+    """
+    Build the approximate index twice from the same corpus and seed and
+    confirm both return the same candidates
+    """
+    rng = random.Random(seed)
+    corpus = synthetic_corpus(rng, size)
+    first = CaseIndex.build(corpus, ann=True, seed=seed)
+    second = CaseIndex.build(corpus, ann=True, seed=seed)
+    for _ in range(queries):
+        query = first.vectorizer.transform([synthetic_facts(rng, 3)])
+        if not np.array_equal(first.ann.candidates(query), second.ann.candidates(query)):
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check or update the golden analysis outputs")
+    parser.add_argument("command", choices=["check", "update"])
+    parser.add_argument("--directory", default=GOLDEN_DIR)
+    parser.add_argument("--ann", action="store_true", help="Also check that the approximate index rebuilds identically")
+    args = parser.parse_args()
+
+    if args.command == "update":
+        count = update_golden(args.directory)
+        print(f"Recorded golden outputs for {count} cases in {args.directory}")
+        sys.exit(0)
+
+    mismatches = check_golden(args.directory)
+    for mismatch in mismatches[:50]:
+        print(mismatch)
+    if args.ann and not check_ann_reproducible():
+        mismatches.append("approximate index differs between rebuilds")
+        print(mismatches[-1])
+    print("Golden outputs match." if not mismatches else f"{len(mismatches)} differences from golden outputs.")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,228 @@
+import io
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from PyPDF2 import PdfReader
+
+# Limits for document ingestion
+DEFAULT_WORKERS = 4
+MAX_FACT_CHARS = 200000
+MAX_EVIDENCE_DESCRIPTION = 200
+
+# Evidence table columns, and other headings accepted for each
+EVIDENCE_COLUMNS = {
+    "description": ("description", "evidence", "exhibit", "item"),
+    "reliability": ("reliability",),
+    "relevance": ("relevance",),
+    "source": ("source", "file", "document")
+}
+DEFAULT_EVIDENCE_RATING = 3
+
+# Exhibit headings at the start of a line, e.g. "EXHIBIT 12" or "Exhibit A-3"
+EXHIBIT_PATTERN = re.compile(r"^\s*exhibit\s+([\w.-]+)[\s:.-]*(.*)$", re.IGNORECASE | re.MULTILINE)
+
+
+def _document_name(document):
+    if isinstance(document, tuple):
+        return document[0]
+    return document if isinstance(document, str) else document.name
+
+
+def _document_name_and_data(document):
+    """
+    Accept a Streamlit UploadedFile, a (name, bytes) pair or a file path
+    """
+    if isinstance(document, tuple):
+        return document
+    if isinstance(document, str):
+        with open(document, "rb") as f:
+            return document, f.read()
+    return document.name, document.getvalue()
+
+
+def iter_pdf_pages(data, workers=DEFAULT_WORKERS):
+    """
+    Yield (page_number, page_count, text) for each page of a PDF, in order.
+
+    Pages are extracted in a thread pool with at most 2 * workers pages in
+    flight, so memory stays bounded however long the document is. Each thread
+    parses its own reader because PdfReader is not safe to share.
+    """
+    page_count = len(PdfReader(io.BytesIO(data)).pages)
+    local = threading.local()
+
+    def extract(page_number):
+        if not hasattr(local, "reader"):
+            local.reader = PdfReader(io.BytesIO(data))
+        text = local.reader.pages[page_number].extract_text() or ""
+        return re.sub(r"[ \t]+", " ", text).strip()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        next_page = 0
+        while next_page < page_count or pending:
+            while next_page < page_count and len(pending) < 2 * workers:
+                pending.append((next_page, executor.submit(extract, next_page)))
+                next_page += 1
+            page_number, future = pending.popleft()
+            yield page_number + 1, page_count, future.result()
+
+
+def iter_document_pages(document, workers=DEFAULT_WORKERS):
+    """
+    Yield (name, page_number, page_count, text) for a PDF or plain-text document
+    """
+    name, data = _document_name_and_data(document)
+    if name.lower().endswith(".pdf"):
+        for page_number, page_count, text in iter_pdf_pages(data, workers):
+            yield name, page_number, page_count, text
+    else:
+        # Plain text: form feeds separate pages
+        pages = data.decode("utf-8", errors="replace").split("\f")
+        for page_number, text in enumerate(pages, start=1):
+            yield name, page_number, len(pages), text.strip()
+
+
+def evidence_from_page(name, page_number, text):
+    """
+    Create evidence entries for exhibit headings found on a page
+    """
+    evidence = []
+    for match in EXHIBIT_PATTERN.finditer(text):
+        label, title = match.group(1), match.group(2).strip()
+        description = f"Exhibit {label}: {title}" if title else f"Exhibit {label}"
+        evidence.append({
+            "description": f"{description[:MAX_EVIDENCE_DESCRIPTION]} ({name}, p. {page_number})",
+            "reliability": DEFAULT_EVIDENCE_RATING,
+            "relevance": DEFAULT_EVIDENCE_RATING,
+            "source": name
+        })
+    return evidence
+
+
+def ingest_documents(documents, workers=DEFAULT_WORKERS, max_fact_chars=MAX_FACT_CHARS, progress=None):
+    """
+    Stream documents page by page into case facts and evidence entries.
+
+    Parameters:
+    documents (list): Uploaded files, (name, bytes) pairs or paths
+    workers (int): Text extraction threads per document
+    max_fact_chars (int): Cap on the amount of fact text kept
+    progress (callable): Called as progress(name, page_number, page_count)
+
+    Returns:
+    dict: facts text, evidence entries, pages processed and whether the
+        facts were truncated
+    """
+    fact_parts = []
+    fact_chars = 0
+    truncated = False
+    evidence = []
+    pages = 0
+
+    for document in documents:
+        document_evidence = []
+        for name, page_number, page_count, text in iter_document_pages(document, workers):
+            pages += 1
+            document_evidence.extend(evidence_from_page(name, page_number, text))
+
+            # Keep fact text up to the cap; later pages only contribute exhibits
+            if text and fact_chars < max_fact_chars:
+                text = text[:max_fact_chars - fact_chars]
+                fact_parts.append(text)
+                fact_chars += len(text)
+            elif text:
+                truncated = True
+
+            if progress is not None:
+                progress(name, page_number, page_count)
+
+        # A document without exhibit headings becomes one evidence entry itself
+        if not document_evidence:
+            name = _document_name(document)
+            document_evidence.append({
+                "description": f"Document: {name}",
+                "reliability": DEFAULT_EVIDENCE_RATING,
+                "relevance": DEFAULT_EVIDENCE_RATING,
+                "source": name
+            })
+        evidence.extend(document_evidence)
+
+    return {
+        "facts": "\n\n".join(fact_parts),
+        "evidence": evidence,
+        "pages": pages,
+        "truncated": truncated
+    }
+
+
+def read_evidence_table(document):
+    """
+    Read an evidence table from a CSV, Excel or JSON file into a DataFrame.
+
+    Column headings are matched case-insensitively against EVIDENCE_COLUMNS;
+    other columns are dropped. Excel files need openpyxl. The number of
+    heading rows before the first record is kept in attrs["header_rows"].
+    """
+    name, data = _document_name_and_data(document)
+    extension = name.rsplit(".", 1)[-1].lower()
+    header_rows = 1
+    if extension == "csv":
+        table = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+    elif extension == "xlsx":
+        table = pd.read_excel(io.BytesIO(data), dtype=str).fillna("")
+    elif extension == "json":
+        table = pd.read_json(io.BytesIO(data), dtype=False)
+        header_rows = 0
+    else:
+        raise ValueError(f"Unsupported evidence file type: {name}")
+
+    headings = {str(column).strip().lower(): column for column in table.columns}
+    columns = {}
+    for column, aliases in EVIDENCE_COLUMNS.items():
+        for alias in aliases:
+            if alias in headings:
+                columns[column] = table[headings[alias]]
+                break
+    if "description" not in columns:
+        raise ValueError(f"{name} has no description column")
+    evidence = pd.DataFrame(columns)
+    evidence.attrs["header_rows"] = header_rows
+    return evidence
+
+
+def validate_evidence_table(table):
+    """
+    Validate every row of an evidence table at once.
+
+    Descriptions must be non-empty and ratings whole numbers from 1 to 5;
+    missing rating columns default to DEFAULT_EVIDENCE_RATING.
+
+    Returns:
+    tuple: (DataFrame of valid rows with integer ratings, list of
+        "row n: problem" messages for the rejected rows, numbered as in
+        the file after table.attrs["header_rows"] heading rows)
+    """
+    # Null cells (empty JSON fields, blank Excel cells) count as missing, not as "nan"
+    valid = pd.DataFrame({"description": table["description"].fillna("").astype(str).str.strip()})
+    problems = pd.Series("", index=table.index)
+    problems[valid["description"] == ""] += "missing description; "
+    for column in ("reliability", "relevance"):
+        if column not in table:
+            valid[column] = DEFAULT_EVIDENCE_RATING
+            continue
+        ratings = pd.to_numeric(table[column], errors="coerce")
+        invalid = ~ratings.between(1, 5) | (ratings % 1 != 0)
+        problems[invalid] += f"{column} must be 1-5; "
+        valid[column] = ratings.where(~invalid, 0).astype(int)
+    if "source" in table:
+        valid["source"] = table["source"].fillna("").astype(str).str.strip()
+
+    rejected = problems != ""
+    first_row = table.attrs.get("header_rows", 1) + 1
+    errors = [f"row {position + first_row}: {problem.rstrip('; ')}"
+              for position, problem in zip(range(len(table)), problems) if problem]
+    return valid[~rejected.to_numpy()].reset_index(drop=True), errors
@@ -0,0 +1,174 @@
+import os
+import io
+import json
+import time
+import pstats
+import cProfile
+import threading
+import functools
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+# Append every finished trace as a JSON line to this file, if set
+PERF_LOG_PATH = os.environ.get("PERF_LOG_PATH", "")
+DEFAULT_METRICS_PATH = os.path.join("data", "metrics.prom")
+
+CAPTURE_MODES = [None, "cprofile", "tracemalloc"]
+
+_local = threading.local()
+_totals = {}
+_totals_lock = threading.Lock()
+recent_traces = deque(maxlen=20)
+
+
+class Trace:
+    """
+    Spans recorded while handling one request, plus optional profile output
+    """
+
+    def __init__(self, name, capture=None):
+        self.name = name
+        self.capture = capture
+        self.started = time.time()
+        self.origin = time.perf_counter()
+        self.duration = 0.0
+        self.spans = []
+        self.depth = 0
+        self.profile = ""
+        self.memory_peak_mb = None
+        self.memory_top = []
+
+    def summary(self):
+        """
+        Total time and call count per span name, in first-seen order
+        """
+        totals = {}
+        for name, _, _, duration in self.spans:
+            entry = totals.setdefault(name, {"calls": 0, "total_ms": 0.0})
+            entry["calls"] += 1
+            entry["total_ms"] += duration * 1000
+        return totals
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "started": self.started,
+            "duration_ms": self.duration * 1000,
+            "spans": [{"name": name, "depth": depth, "offset_ms": offset * 1000, "duration_ms": duration * 1000}
+                      for name, depth, offset, duration in self.spans],
+            "memory_peak_mb": self.memory_peak_mb
+        }
+
+
+@contextmanager
+def span(name):
+    """
+    Time a block of code, recording it in the current trace and the process totals
+    """
+    trace_ = getattr(_local, "trace", None)
+    if trace_ is not None:
+        trace_.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        if trace_ is not None:
+            trace_.depth -= 1
+            trace_.spans.append((name, trace_.depth, start - trace_.origin, duration))
+        with _totals_lock:
+            entry = _totals.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += duration
+
+
+def timed(name=None):
+    """
+    Decorator form of span(); the span name defaults to the function name
+    """
+    def decorator(function):
+        span_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def trace(name, capture=None):
+    """
+    Collect the spans of one request. capture may be "cprofile" or
+    "tracemalloc" to also record a profile or allocation peak.
+    """
+    previous = getattr(_local, "trace", None)
+    current = Trace(name, capture)
+    _local.trace = current
+
+    profiler = None
+    started_tracemalloc = False
+    if capture == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif capture == "tracemalloc":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracemalloc = True
+        tracemalloc.reset_peak()
+
+    try:
+        yield current
+    finally:
+        current.duration = time.perf_counter() - current.origin
+        if profiler is not None:
+            profiler.disable()
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(25)
+            current.profile = output.getvalue()
+        if capture == "tracemalloc":
+            current.memory_peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+            current.memory_top = [str(stat) for stat in tracemalloc.take_snapshot().statistics("lineno")[:10]]
+            if started_tracemalloc:
+                tracemalloc.stop()
+
+        _local.trace = previous
+        current.spans.sort(key=lambda s: s[2])
+        recent_traces.append(current)
+        if PERF_LOG_PATH:
+            export_json(current, PERF_LOG_PATH)
+
+
+def export_json(trace_, path):
+    """
+    Append a trace to a JSON-lines log
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(trace_.to_dict()) + "\n")
+
+
+def export_prometheus(path=DEFAULT_METRICS_PATH):
+    """
+    Write per-span totals in the Prometheus text format (for a textfile collector)
+    """
+    with _totals_lock:
+        totals = dict(_totals)
+    lines = [
+        "# HELP analysis_stage_seconds Time spent in each analysis stage.",
+        "# TYPE analysis_stage_seconds summary"
+    ]
+    for name, (count, seconds) in sorted(totals.items()):
+        lines.append(f'analysis_stage_seconds_count{{stage="{name}"}} {count}')
+        lines.append(f'analysis_stage_seconds_sum{{stage="{name}"}} {seconds:.6f}')
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename so a collector never reads a partial file
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(path + ".tmp", path)
+    return path
@@ -0,0 +1,110 @@
+import re
+
+# Evidence type keywords, checked in order - the first matching type wins
+EVIDENCE_TYPE_KEYWORDS = [
+    ("documentary", ["contract", "agreement", "document", "letter", "email", "record", "report", "file"]),
+    ("testimonial", ["witness", "testimony", "statement", "deposition", "interview"]),
+    ("physical", ["physical", "exhibit", "photograph", "video", "recording", "object"]),
+    ("expert", ["expert", "opinion", "analysis", "report", "evaluation"])
+]
+
+# Strategy approach keywords
+STRATEGY_KEYWORDS = [
+    ("procedural", ["procedural", "process", "motion to dismiss", "summary judgment", "jurisdiction"]),
+    ("substantive", ["substantive", "merits", "elements", "statutory", "precedent"]),
+    ("settlement", ["settlement", "negotiation", "mediation", "resolution", "compromise"]),
+    ("aggressive", ["aggressive", "challenge", "attack", "counter", "offensive"]),
+    ("defensive", ["defensive", "mitigate", "limit", "reduce", "protect"])
+]
+
+# Outcome terms recognised in a precedent's outcome text; "unfavorable" also contains "favorable"
+OUTCOME_KEYWORDS = [
+    ("win", ["win"]),
+    ("favorable", ["favorable"]),
+    ("success", ["success"]),
+    ("loss", ["loss"]),
+    ("unfavorable", ["unfavorable"])
+]
+
+
+class KeywordMatcher:
+    """
+    Classify text against a table of keyword buckets in a single scan.
+
+    All keywords are compiled into one alternation regex (longest first) and
+    the text is scanned once, resuming one character after each match start so
+    overlapping keywords are still seen. The longest keyword found at a position
+    also accounts for the shorter keywords it starts with (e.g. "recording"
+    implies "record"), which keeps results identical to testing each keyword
+    with `in`.
+
+    table is a dict or list of (category, keywords) pairs; a keyword may
+    appear in several categories. With word_boundary=True keywords only match
+    whole words.
+    """
+
+    def __init__(self, table, word_boundary=False):
+        self.table = [(category, list(keywords)) for category, keywords in
+                      (table.items() if isinstance(table, dict) else table)]
+        self.word_boundary = word_boundary
+
+        # Keyword -> categories it counts toward
+        self.keyword_categories = {}
+        for category, keywords in self.table:
+            for keyword in keywords:
+                categories = self.keyword_categories.setdefault(keyword.lower(), [])
+                if category not in categories:
+                    categories.append(category)
+
+        keywords = sorted(self.keyword_categories, key=lambda k: (-len(k), k))
+        boundary = r"\b" if word_boundary else ""
+        alternation = "|".join(re.escape(keyword) for keyword in keywords)
+        self.pattern = re.compile(f"{boundary}(?:{alternation}){boundary}") if keywords else None
+
+        # Keywords implied by a match of a longer keyword at the same position
+        self.implied = {}
+        for keyword in keywords:
+            self.implied[keyword] = [other for other in keywords
+                                     if re.match(f"{re.escape(other)}{boundary}", keyword)]
+
+    def found(self, text, lowered=False):
+        """
+        Set of keywords present in the text. Pass lowered=True if the text is
+        already lower-case.
+        """
+        if self.pattern is None:
+            return set()
+        if not lowered:
+            text = text.lower()
+
+        found = set()
+        search = self.pattern.search
+        match = search(text)
+        while match:
+            keyword = match.group()
+            if keyword not in found:
+                found.update(self.implied[keyword])
+            match = search(text, match.start() + 1)
+        return found
+
+    def counts(self, text, lowered=False):
+        """
+        Number of distinct keywords matched per category, in table order
+        """
+        counts = {category: 0 for category, _ in self.table}
+        for keyword in self.found(text, lowered):
+            for category in self.keyword_categories[keyword]:
+                counts[category] += 1
+        return counts
+
+    def first_match(self, text, default=None, lowered=False):
+        """
+        First category in table order with at least one matching keyword
+        """
+        counts = self.counts(text, lowered)
+        return next((category for category, count in counts.items() if count > 0), default)
+
+
+EVIDENCE_TYPE_MATCHER = KeywordMatcher(EVIDENCE_TYPE_KEYWORDS)
+STRATEGY_MATCHER = KeywordMatcher(STRATEGY_KEYWORDS)
+OUTCOME_MATCHER = KeywordMatcher(OUTCOME_KEYWORDS)
@@ -2,15 +2,85 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import re
-import json
+import bisect
 import google.generativeai as genai
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from google.ai import generativelanguage
+from case_index import (OUTCOME_FAVORABLE, OUTCOME_LOSS, OUTCOME_POSITIVE, OUTCOME_UNFAVORABLE, OUTCOME_WIN,
+                        get_case_index, outcome_flags)
+from keywords import EVIDENCE_TYPE_KEYWORDS, EVIDENCE_TYPE_MATCHER, STRATEGY_MATCHER
+from response_cache import cache_key, get_response_cache
+from reply_parser import IncrementalJsonParser, parse_analysis, validate_sections
+from ingest import ingest_documents, read_evidence_table, validate_evidence_table
+from segmenter import iter_sentences
+from outcome_model import get_outcome_model, outcome_text
+from instrumentation import CAPTURE_MODES, export_prometheus, span, trace
+from pipeline import IncrementalPipeline, Stage
+from results import Recommendations
+from prompt_builder import DEFAULT_PROMPT_TOKENS, RESPONSE_SCHEMA, build_prompt
+from store import get_store
+from router import DEFAULT_MODELS, ROUTING_MODES, ensemble_analysis, escalation_reasons, parse_model_weights
+
+# Heavy resources are created once per process and shared across reruns and sessions
+@st.cache_resource(show_spinner=False)
+def load_gemini_model(api_key, model_name="gemini-pro"):
+    """
+    Create the model with its own API client for this key
+    """
+    model = genai.GenerativeModel(model_name)
+    # genai.configure() sets one key for the whole process, so each key gets a
+    # client of its own and sessions never send requests with another user's key
+    model._client = generativelanguage.GenerativeServiceClient(client_options={"api_key": api_key})
+    return model
+
+@st.cache_resource(show_spinner="Loading case index...")
+def load_case_index():
+    """
+    Load the similar-case index
+    """
+    return get_case_index()
+
+@st.cache_resource(show_spinner=False)
+def load_outcome_model():
+    """
+    Load the trained win-probability model, if one has been trained
+    """
+    return get_outcome_model()
+
+@st.cache_resource(show_spinner=False)
+def load_response_cache():
+    """
+    Open the Gemini response cache
+    """
+    return get_response_cache()
+
+@st.cache_resource(show_spinner=False)
+def load_analysis_store():
+    """
+    Open the store of saved analyses
+    """
+    return get_store()
+
+@st.cache_resource(show_spinner="Warming up analysis engine...")
+def warm_up_resources():
+    """
+    Load heavy resources and run one throwaway analysis so the first real
+    request does not pay for index loading or first-call setup
+    """
+    load_case_index()
+    load_outcome_model()
+    load_response_cache()
+    analyze_user_evidence_and_strategy(
+        {"facts": "Warm-up case facts for the analysis engine."},
+        [{"description": "Warm-up contract document", "reliability": 3, "relevance": 3}],
+        "Warm-up strategy with settlement negotiation"
+    )
+    return True
 
 # Configure Gemini API
-def configure_gemini():
+def configure_gemini(model_weights=(("gemini-pro", 1.0),)):
     """
-    Configure the Gemini API with your API key
+    Configure the Gemini API with your API key and return (model, weight)
+    pairs for the configured models
     """
     # You'll need to get an API key from Google AI Studio
     api_key = st.secrets.get("GEMINI_API_KEY", "")
@@ -21,111 +91,144 @@ def configure_gemini():
         if not api_key:
             st.stop()
 
-    # Configure the Gemini API
-    genai.configure(api_key=api_key)
-    return genai.GenerativeModel('gemini-pro')
+    if not model_weights:
+        raise ValueError("No Gemini models configured")
+    
+    # Create the Gemini models (cached per API key and model)
+    return [(load_gemini_model(api_key, name), weight) for name, weight in model_weights]
 
-def analyze_with_gemini(model, case_details, user_evidence, user_strategy):
+def build_gemini_prompt(case_details, user_evidence, user_strategy, max_tokens=DEFAULT_PROMPT_TOKENS):
     """
-    Use Gemini API to analyze the case, evidence, and strategy
+    Build the analysis prompt sent to Gemini: the shared instructions and
+    schema, then compact evidence and facts fitted to a token budget
     """
-    # Prepare the prompt for Gemini
-    prompt = f"""
-    You are a legal expert AI specialized in analyzing legal cases and predicting outcomes.
-    Please analyze the following case details, evidence, and legal strategy to predict the outcome 
-    and provide strategic recommendations.
-
-    ## Case Details:
-    {case_details}
-
-    ## Evidence Items:
-    {json.dumps(user_evidence, indent=2)}
-
-    ## Legal Strategy:
-    {user_strategy}
-
-    Provide a detailed analysis including:
-    1. Win probability percentage (between 0 and 100)
-    2. Outcome analysis with key positive and negative factors
-    3. Evidence analysis with strengths, weaknesses, and improvement suggestions
-    4. Strategy analysis with strengths, gaps, and effectiveness
-    5. Comparable case analysis (if applicable)
-    6. Judicial considerations
-    7. Strategic recommendations ordered by priority
-
-    Format your response as a JSON object with the following structure:
-    {{
-        "win_probability": {{
-            "win_probability": float,
-            "base_case_probability": float,
-            "evidence_contribution": float,
-            "strategy_contribution": float
-        }},
-        "outcome_analysis": {{
-            "outcome_category": string,
-            "outcome_description": string,
-            "key_positive_factors": [string],
-            "key_negative_factors": [string],
-            "judicial_considerations": [string]
-        }},
-        "evidence_analysis": {{
-            "evidence_items": [
-                {{
-                    "description": string,
-                    "type": string,
-                    "strength_score": float,
-                    "category": string,
-                    "improvement_suggestions": [string]
-                }}
-            ],
-            "overall_score": float,
-            "overall_category": string,
-            "portfolio_gaps": [string],
-            "portfolio_strengths": [string]
-        }},
-        "strategy_analysis": {{
-            "primary_strategy": string,
-            "secondary_strategy": string,
-            "strategy_scores": object,
-            "strategy_balance": string,
-            "strategy_gaps": [string],
-            "strategy_effectiveness": string
-        }},
-        "similar_cases": [
-            {{
-                "title": string,
-                "similarity": float,
-                "outcome": string,
-                "key_factors": [string],
-                "evidence_strength": string,
-                "strategy_used": string
-            }}
-        ],
-        "recommendations": [
-            {{
-                "category": string,
-                "priority": string,
-                "recommendation": string,
-                "rationale": string
-            }}
-        ]
-    }}
+    return build_prompt(case_details, user_evidence, user_strategy, max_tokens)
+
+def parse_gemini_response(text):
     """
+    Extract the analysis sections from a Gemini reply.
+    Stray text and braces are ignored, a truncated reply is repaired, and
+    sections that do not match the result schema are dropped. Raises
+    ValueError if no usable section remains.
+    """
+    return parse_analysis(text, RESPONSE_SCHEMA)
 
-    try:
-        response = model.generate_content(prompt)
-        # Extract the JSON part from the response
-        json_start = response.text.find('{')
-        json_end = response.text.rfind('}') + 1
-        json_str = response.text[json_start:json_end]
-
-        # Parse the JSON response
-        result = json.loads(json_str)
+def valid_sections(parsed):
+    """
+    The schema sections present in parsed that pass validation
+    """
+    return validate_sections(parsed, {section: RESPONSE_SCHEMA[section]
+                                      for section in parsed if section in RESPONSE_SCHEMA})[0]
+
+def fill_missing_sections(result, case_details, user_evidence, user_strategy, rule_result=None):
+    """
+    Complete a partial Gemini analysis with the rule-based sections it lacks,
+    taken from rule_result when the caller has already computed it
+    """
+    missing = [section for section in RESPONSE_SCHEMA if section not in result]
+    if not missing:
         return result
+    fallback = rule_result
+    if fallback is None:
+        fallback = analyze_user_evidence_and_strategy(case_details, user_evidence, user_strategy)
+    return dict(result, **{section: fallback[section] for section in missing})
+
+def analyze_with_gemini(model, case_details, user_evidence, user_strategy, cache=None, rule_result=None):
+    """
+    Use Gemini API to analyze the case, evidence, and strategy.
+    If a ResponseCache is given, identical requests are answered from it.
+    A rule_result already computed for the same inputs is used for fallbacks.
+    """
+    # Return a cached analysis for identical inputs
+    key = None
+    if cache is not None:
+        key = cache_key(case_details, user_evidence, user_strategy, getattr(model, "model_name", ""))
+        with span("response_cache.get"):
+            cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    # Prepare the prompt for Gemini
+    with span("gemini.build_prompt"):
+        prompt = build_gemini_prompt(case_details, user_evidence, user_strategy)
+
+    try:
+        with span("gemini.generate"):
+            response = model.generate_content(prompt)
+        # Extract the valid sections from the response
+        with span("gemini.parse"):
+            result = parse_gemini_response(response.text)
     except Exception as e:
         st.error(f"Error in Gemini API: {str(e)}")
         # Fallback to the original analysis function if Gemini API fails
-        return analyze_user_evidence_and_strategy(case_details, user_evidence, user_strategy)
+        return fill_missing_sections({}, case_details, user_evidence, user_strategy, rule_result)
+    
+    # Only complete analyses are cached; partial ones are completed from the rule engine
+    if len(result) < len(RESPONSE_SCHEMA):
+        st.warning(f"Gemini reply was incomplete; {len(RESPONSE_SCHEMA) - len(result)} sections "
+                   "come from the rule-based analysis.")
+        return fill_missing_sections(result, case_details, user_evidence, user_strategy, rule_result)
+    if cache is not None:
+        cache.put(key, result)
+    return result
+
+def stream_gemini_analysis(model, case_details, user_evidence, user_strategy, cache=None, rule_result=None):
+    """
+    Stream a Gemini analysis, yielding (section, value) pairs as soon as each
+    top-level section of the reply is complete and valid. If the stream fails
+    or is cut short, whatever can be repaired from it is kept and only the
+    remaining sections are filled in from the rule-based analysis (rule_result,
+    if already computed).
+    """
+    # Replay a cached analysis for identical inputs
+    key = None
+    if cache is not None:
+        key = cache_key(case_details, user_evidence, user_strategy, getattr(model, "model_name", ""))
+        with span("response_cache.get"):
+            cached = cache.get(key)
+        if cached is not None:
+            yield from cached.items()
+            return
+
+    with span("gemini.build_prompt"):
+        prompt = build_gemini_prompt(case_details, user_evidence, user_strategy)
+    parser = IncrementalJsonParser()
+    received = {}
+    try:
+        with span("gemini.request"):
+            response = model.generate_content(prompt, stream=True)
+        for chunk in response:
+            with span("gemini.parse"):
+                completed = valid_sections(dict(parser.feed(chunk.text)))
+            received.update(completed)
+            yield from completed.items()
+        if not parser.done:
+            raise ValueError("Gemini reply ended before the JSON object was complete")
+    except Exception as e:
+        st.error(f"Error in Gemini API: {str(e)}")
+    
+    # Before falling back, recover what the whole reply holds: a cut-off
+    # object is repaired, and stray braces the stream parser stopped at are skipped
+    if len(received) < len(RESPONSE_SCHEMA) and parser.buffer:
+        try:
+            recovered = parse_gemini_response(parser.buffer)
+        except ValueError:
+            recovered = {}
+        for section, value in recovered.items():
+            if section not in received:
+                received[section] = value
+                yield section, value
+    
+    if len(received) == len(RESPONSE_SCHEMA):
+        if cache is not None:
+            cache.put(key, received)
+        return
+    
+    # Fill in the missing sections from the original analysis function
+    fallback = fill_missing_sections(received, case_details, user_evidence, user_strategy, rule_result)
+    for section, value in fallback.items():
+        if section not in received:
+            yield section, value
 
 def extract_case_facts(case_details):
     """
@@ -138,80 +241,35 @@ def extract_case_facts(case_details):
         case_text = str(case_details)
         
     # Simple implementation - in a real system, this could use NLP to extract entities and facts
-    facts = []
-    
-    # Split by sentences and extract potential facts
-    sentences = re.split(r'[.!?]', case_text)
-    for sentence in sentences:
-        if len(sentence.strip()) > 10:  # Ignore very short sentences
-            facts.append(sentence.strip())
-    
-    return facts
-
-def find_similar_cases(case_facts):
-    """
-    Find similar cases from a database using TF-IDF and cosine similarity
-    """
-    # In a real implementation, this would query a database of cases
-    # For demo purposes, we'll return mock similar cases
-    
-    # Mock database of cases
-    mock_cases = [
-        {
-            "title": "Smith v. Johnson (2020)",
-            "facts": "Plaintiff alleged breach of contract when defendant failed to deliver goods on time.",
-            "outcome": "Favorable settlement",
-            "evidence_strength": "Strong documentary evidence",
-            "strategy_used": "Focus on contract terms and damages",
-            "key_factors": ["Clear contract terms", "Documented timeline", "Quantifiable damages"]
-        },
-        {
-            "title": "Williams v. City Council (2019)",
-            "facts": "Challenge to municipal ordinance on constitutional grounds.",
-            "outcome": "Partially successful",
-            "evidence_strength": "Mixed precedent support",
-            "strategy_used": "Constitutional rights approach",
-            "key_factors": ["Procedural due process", "Similar precedent cases", "Expert testimony"]
-        },
-        {
-            "title": "Estate of Roberts v. Medical Center (2021)",
-            "facts": "Medical malpractice claim related to surgical complications.",
-            "outcome": "Loss at trial",
-            "evidence_strength": "Contradictory expert testimony",
-            "strategy_used": "Technical medical arguments",
-            "key_factors": ["Conflicting expert opinions", "Pre-existing conditions", "Informed consent documentation"]
-        },
-        {
-            "title": "Thompson v. Insurance Co. (2022)",
-            "facts": "Denial of coverage claim based on policy exclusion.",
-            "outcome": "Win through summary judgment",
-            "evidence_strength": "Clear policy documentation",
-            "strategy_used": "Strict policy interpretation",
-            "key_factors": ["Policy language clarity", "Industry standards", "Documented communications"]
-        },
-        {
-            "title": "Garcia Family Trust v. Developer (2021)",
-            "facts": "Property dispute over easement rights and boundary lines.",
-            "outcome": "Settlement after discovery",
-            "evidence_strength": "Historical survey evidence",
-            "strategy_used": "Historical documentation approach",
-            "key_factors": ["Survey records", "Witness testimony", "Pattern of use"]
-        }
-    ]
+    # Sentences are segmented per paragraph (aware of legal abbreviations and citations)
+    # and cached, so unchanged paragraphs of a long narrative are not re-segmented
+    return [sentence for sentence in iter_sentences(case_text) if len(sentence) > 10]  # Ignore very short sentences
+
+def find_similar_cases(case_facts, top_k=5, retrieval_mode="auto"):
+    """
+    Find similar cases from the case index using TF-IDF and cosine similarity.
+    retrieval_mode is "exact", "ann" (approximate, for very large corpora) or "auto".
+    """
+    index = get_case_index()
+    query_text = " ".join(case_facts) if isinstance(case_facts, list) else str(case_facts)
     
-    # For demo purposes, assign random similarity scores
     similar_cases = []
-    for case in mock_cases:
-        # In a real implementation, we would calculate actual similarity scores
-        similarity = np.random.uniform(0.3, 0.9)
-        similar_case = case.copy()
+    for position, similarity in index.search(query_text, top_k=top_k, mode=retrieval_mode):
+        similar_case = index.case(position)
         similar_case["similarity"] = similarity
         similar_cases.append(similar_case)
     
-    # Sort by similarity
-    similar_cases.sort(key=lambda x: x["similarity"], reverse=True)
+    # Results are already ordered by similarity (ties broken by corpus order)
     return similar_cases
 
+def case_outcome_flags(case):
+    """
+    OUTCOME_* flags of a similar case: precomputed for cases from the index,
+    derived from the outcome text for any other case dict
+    """
+    flags = getattr(case, "outcome_flags", None)
+    return outcome_flags(case["outcome"]) if flags is None else flags
+
 def assess_evidence_strength(user_evidence):
     """
     Assess the strength of evidence items provided by the user.
@@ -266,161 +324,231 @@ def assess_evidence_strength(user_evidence):
         "portfolio_strengths": portfolio_strengths
     }
 
-def categorize_evidence_type(description):
+# Lower bounds of the evidence strength categories
+EVIDENCE_STRENGTH_BINS = [50, 60, 70, 80]
+EVIDENCE_STRENGTH_LABELS = ["Weak", "Acceptable", "Moderate", "Strong", "Very Strong"]
+
+# Thresholds shared by the per-item and vectorized evidence assessments
+SUGGESTION_SCORE_THRESHOLD = 50    # items scoring below this may not be worth presenting
+SUGGESTION_RATING_THRESHOLD = 4    # reliability / relevance below this gets a type-specific suggestion
+WEAK_ITEM_SCORE = 60               # items below this count as weak or acceptable
+STRONG_ITEM_SCORE = 70             # items at or above this count as strong
+DIVERSE_TYPE_COUNT = 3
+SUBSTANTIAL_PORTFOLIO_SIZE = 5
+LIMITED_PORTFOLIO_SIZE = 3
+
+# Improvement suggestion rules as (evidence type, field, suggestion); None matches any type.
+# Bit i of a suggestion mask in assess_evidence_portfolios is rule i.
+EVIDENCE_SUGGESTION_RULES = [
+    (None, "strength_score", "Consider if this evidence is worth presenting or needs significant strengthening"),
+    ("documentary", "reliability", "Verify document authenticity and chain of custody"),
+    ("documentary", "relevance", "Clarify direct connection between this document and case issues"),
+    ("testimonial", "reliability", "Prepare witness thoroughly and anticipate credibility challenges"),
+    ("testimonial", "relevance", "Focus testimony on directly relevant facts"),
+    ("physical", "reliability", "Ensure proper authentication and chain of custody documentation"),
+    ("expert", "reliability", "Reinforce expert's qualifications and methodology"),
+    ("expert", "relevance", "Connect expert opinion more directly to case facts")
+]
+DEFAULT_EVIDENCE_SUGGESTION = "Continue to integrate this evidence effectively with your overall strategy"
+
+# Evidence types whose absence is a portfolio gap, with the message for each
+MISSING_EVIDENCE_TYPE_GAPS = [
+    ("documentary", "No documentary evidence present - consider adding documentation to strengthen case"),
+    ("testimonial", "No witness testimony included - consider adding witness statements to support facts"),
+    ("expert", "No expert evidence provided - consider if expert opinion would strengthen your position")
+]
+
+def categorize_evidence_type(description, matcher=EVIDENCE_TYPE_MATCHER):
     """
-    Determine the type of evidence based on its description
+    Determine the type of evidence based on its description.
+    Document, testimony, physical and expert types are checked in turn,
+    defaulting to "other".
     """
-    description = description.lower()
-    
-    # Check for document types
-    if any(word in description for word in ["contract", "agreement", "document", "letter", "email", "record", "report", "file"]):
-        return "documentary"
-    
-    # Check for testimony types
-    elif any(word in description for word in ["witness", "testimony", "statement", "deposition", "interview"]):
-        return "testimonial"
-    
-    # Check for physical evidence
-    elif any(word in description for word in ["physical", "exhibit", "photograph", "video", "recording", "object"]):
-        return "physical"
-    
-    # Check for expert evidence
-    elif any(word in description for word in ["expert", "opinion", "analysis", "report", "evaluation"]):
-        return "expert"
-    
-    # Default to "other"
-    return "other"
+    return matcher.first_match(description, "other")
 
 def categorize_evidence_strength(score):
     """
     Categorize evidence strength based on score
     """
-    if score >= 80:
-        return "Very Strong"
-    elif score >= 70:
-        return "Strong"
-    elif score >= 60:
-        return "Moderate"
-    elif score >= 50:
-        return "Acceptable"
-    else:
-        return "Weak"
+    return EVIDENCE_STRENGTH_LABELS[bisect.bisect_right(EVIDENCE_STRENGTH_BINS, score)]
 
 def suggest_evidence_improvements(item, evidence_type, strength_score):
     """
     Suggest improvements for evidence based on its type and strength score
     """
-    suggestions = []
-    
-    # General suggestions based on strength
-    if strength_score < 50:
-        suggestions.append("Consider if this evidence is worth presenting or needs significant strengthening")
-    
-    # Type-specific suggestions
-    if evidence_type == "documentary":
-        if item["reliability"] < 4:
-            suggestions.append("Verify document authenticity and chain of custody")
-        if item["relevance"] < 4:
-            suggestions.append("Clarify direct connection between this document and case issues")
-            
-    elif evidence_type == "testimonial":
-        if item["reliability"] < 4:
-            suggestions.append("Prepare witness thoroughly and anticipate credibility challenges")
-        if item["relevance"] < 4:
-            suggestions.append("Focus testimony on directly relevant facts")
-            
-    elif evidence_type == "physical":
-        if item["reliability"] < 4:
-            suggestions.append("Ensure proper authentication and chain of custody documentation")
-        
-    elif evidence_type == "expert":
-        if item["reliability"] < 4:
-            suggestions.append("Reinforce expert's qualifications and methodology")
-        if item["relevance"] < 4:
-            suggestions.append("Connect expert opinion more directly to case facts")
+    fields = {
+        "strength_score": strength_score < SUGGESTION_SCORE_THRESHOLD,
+        "reliability": item["reliability"] < SUGGESTION_RATING_THRESHOLD,
+        "relevance": item["relevance"] < SUGGESTION_RATING_THRESHOLD
+    }
+    suggestions = [suggestion for rule_type, field, suggestion in EVIDENCE_SUGGESTION_RULES
+                   if fields[field] and rule_type in (None, evidence_type)]
     
     # Add general suggestion if none specific
-    if not suggestions:
-        suggestions.append("Continue to integrate this evidence effectively with your overall strategy")
-        
-    return suggestions
+    return suggestions or [DEFAULT_EVIDENCE_SUGGESTION]
 
-def identify_evidence_gaps(evidence_items):
+def evidence_gap_messages(evidence_types, item_count, weak_count):
     """
-    Identify gaps in the evidence portfolio
+    Portfolio gaps from the evidence types present and the item counts
     """
-    gaps = []
-    
-    # Check evidence type distribution
-    evidence_types = [item["type"] for item in evidence_items]
-    
-    # Check for missing evidence types
-    if "documentary" not in evidence_types:
-        gaps.append("No documentary evidence present - consider adding documentation to strengthen case")
-    
-    if "testimonial" not in evidence_types:
-        gaps.append("No witness testimony included - consider adding witness statements to support facts")
-    
-    if "expert" not in evidence_types:
-        gaps.append("No expert evidence provided - consider if expert opinion would strengthen your position")
+    gaps = [message for evidence_type, message in MISSING_EVIDENCE_TYPE_GAPS if evidence_type not in evidence_types]
     
     # Check for weak areas
-    weak_items = [item for item in evidence_items if item["strength_score"] < 60]
-    if len(weak_items) > len(evidence_items) / 2:
+    if weak_count > item_count / 2:
         gaps.append("More than half of evidence items are rated weak or acceptable - strengthen key elements")
     
     # Add general gap analysis if no specific gaps
-    if not gaps and len(evidence_items) < 3:
+    if not gaps and item_count < LIMITED_PORTFOLIO_SIZE:
         gaps.append("Limited overall evidence portfolio - consider adding more supporting evidence")
-    
     return gaps
 
-def identify_evidence_strengths(evidence_items):
+def evidence_strength_messages(item_count, strong_count, type_count):
     """
-    Identify strengths in the evidence portfolio
+    Portfolio strengths from the item counts and number of distinct evidence types
     """
     strengths = []
-    
-    # Check for strong evidence
-    strong_items = [item for item in evidence_items if item["strength_score"] >= 70]
-    if strong_items:
-        strengths.append(f"Portfolio includes {len(strong_items)} strong evidence items")
-    
-    # Check for diverse evidence types
-    evidence_types = set(item["type"] for item in evidence_items)
-    if len(evidence_types) >= 3:
+    if strong_count:
+        strengths.append(f"Portfolio includes {strong_count} strong evidence items")
+    if type_count >= DIVERSE_TYPE_COUNT:
         strengths.append("Diverse evidence types provide multiple angles of support")
-    
-    # Check for overall portfolio size
-    if len(evidence_items) >= 5:
+    if item_count >= SUBSTANTIAL_PORTFOLIO_SIZE:
         strengths.append("Substantial evidence portfolio size adds cumulative weight")
     
     # Add general strength if none specific
     if not strengths:
         strengths.append("Consider building on existing evidence to create stronger portfolio")
-    
     return strengths
 
-def categorize_strategy(strategy_text):
+def identify_evidence_gaps(evidence_items):
+    """
+    Identify gaps in the evidence portfolio
+    """
+    weak_items = [item for item in evidence_items if item["strength_score"] < WEAK_ITEM_SCORE]
+    return evidence_gap_messages({item["type"] for item in evidence_items}, len(evidence_items), len(weak_items))
+
+def identify_evidence_strengths(evidence_items):
+    """
+    Identify strengths in the evidence portfolio
+    """
+    strong_items = [item for item in evidence_items if item["strength_score"] >= STRONG_ITEM_SCORE]
+    evidence_types = set(item["type"] for item in evidence_items)
+    return evidence_strength_messages(len(evidence_items), len(strong_items), len(evidence_types))
+
+def assess_evidence_portfolios(evidence, portfolio_column="portfolio_id", portfolios=None):
+    """
+    Vectorized assess_evidence_strength over many evidence portfolios at once.
+    
+    Parameters:
+    evidence (DataFrame or dict of arrays): One row per evidence item with
+        portfolio_column, description, reliability and relevance
+    portfolio_column (str): Column identifying the portfolio of each item
+    portfolios (list): Optional portfolio ids to report, including empty ones
+    
+    Returns:
+    tuple: (items DataFrame with type, strength_score, category and
+        improvement_suggestions per item; portfolio DataFrame indexed by
+        portfolio id with the aggregate fields of assess_evidence_strength)
+    """
+    items = pd.DataFrame(evidence).reset_index(drop=True)
+    descriptions = items["description"].astype(str).str.lower()
+    reliability = items["reliability"].to_numpy()
+    relevance = items["relevance"].to_numpy()
+    
+    # Strength scores and category bins
+    scores = (reliability + relevance) * 10
+    labels = np.array(EVIDENCE_STRENGTH_LABELS, dtype=object)
+    items["strength_score"] = scores
+    items["category"] = labels[np.digitize(scores, EVIDENCE_STRENGTH_BINS)]
+    
+    # Evidence types: first matching keyword bucket wins
+    conditions = [descriptions.str.contains("|".join(re.escape(word) for word in keywords), regex=True).to_numpy()
+                  for _, keywords in EVIDENCE_TYPE_KEYWORDS]
+    types = np.select(conditions, [evidence_type for evidence_type, _ in EVIDENCE_TYPE_KEYWORDS], default="other")
+    items["type"] = types
+    
+    # Suggestions as a bitmask of matching rules, expanded once per distinct mask
+    fields = {"strength_score": scores < SUGGESTION_SCORE_THRESHOLD,
+              "reliability": reliability < SUGGESTION_RATING_THRESHOLD,
+              "relevance": relevance < SUGGESTION_RATING_THRESHOLD}
+    masks = np.zeros(len(items), dtype=np.int64)
+    for bit, (evidence_type, field, _) in enumerate(EVIDENCE_SUGGESTION_RULES):
+        matches = fields[field] if evidence_type is None else fields[field] & (types == evidence_type)
+        masks |= matches.astype(np.int64) << bit
+    unique_masks, inverse = np.unique(masks, return_inverse=True)
+    suggestion_lists = np.empty(len(unique_masks), dtype=object)
+    for i, mask in enumerate(unique_masks):
+        suggestions = [rule[2] for bit, rule in enumerate(EVIDENCE_SUGGESTION_RULES) if mask >> bit & 1]
+        suggestion_lists[i] = suggestions or [DEFAULT_EVIDENCE_SUGGESTION]
+    # Items with the same mask share one list; evidence_portfolio_results copies them
+    items["improvement_suggestions"] = suggestion_lists[inverse]
+    
+    # Per-portfolio aggregates from grouped sums of per-item flags
+    all_types = [evidence_type for evidence_type, _ in EVIDENCE_TYPE_KEYWORDS] + ["other"]
+    flags = pd.DataFrame({
+        portfolio_column: items[portfolio_column],
+        "item_count": 1,
+        "total_score": scores,
+        "strong_items": scores >= STRONG_ITEM_SCORE,
+        "weak_items": scores < WEAK_ITEM_SCORE,
+        **{f"has_{evidence_type}": types == evidence_type for evidence_type in all_types}
+    })
+    portfolio = flags.groupby(portfolio_column, sort=False).sum()
+    if portfolios is not None:
+        portfolio = portfolio.reindex(portfolios, fill_value=0)
+    type_columns = [f"has_{evidence_type}" for evidence_type in all_types]
+    portfolio[type_columns] = portfolio[type_columns] > 0
+    portfolio["type_count"] = portfolio[type_columns].sum(axis=1)
+    
+    counts = portfolio["item_count"].to_numpy()
+    overall = np.where(counts > 0, portfolio["total_score"].to_numpy() / np.maximum(counts, 1), 0)
+    portfolio["overall_score"] = overall
+    portfolio["overall_category"] = labels[np.digitize(overall, EVIDENCE_STRENGTH_BINS)]
+    
+    # Gap and strength messages from the same functions as identify_evidence_gaps / identify_evidence_strengths
+    gaps = []
+    strengths = []
+    for row in portfolio.itertuples():
+        present = {evidence_type for evidence_type in all_types if getattr(row, f"has_{evidence_type}")}
+        gaps.append(evidence_gap_messages(present, row.item_count, row.weak_items))
+        strengths.append(evidence_strength_messages(row.item_count, row.strong_items, row.type_count))
+    portfolio["portfolio_gaps"] = gaps
+    portfolio["portfolio_strengths"] = strengths
+    
+    return items, portfolio
+
+def evidence_portfolio_results(items, portfolio, portfolio_column="portfolio_id"):
+    """
+    Convert the frames from assess_evidence_portfolios into the dict returned
+    by assess_evidence_strength, keyed by portfolio id
+    """
+    item_columns = ["description", "type", "strength_score", "category", "improvement_suggestions"]
+    portfolio_items = {key: [] for key in portfolio.index}
+    columns = [items[column].tolist() for column in item_columns]
+    for key, *values in zip(items[portfolio_column].tolist(), *columns):
+        item = dict(zip(item_columns, values))
+        item["improvement_suggestions"] = list(item["improvement_suggestions"])
+        portfolio_items[key].append(item)
+    
+    results = {}
+    for row in portfolio.itertuples():
+        overall_score = float(row.overall_score) if row.item_count else 0
+        results[row.Index] = {
+            "evidence_items": portfolio_items[row.Index],
+            "overall_score": overall_score,
+            "overall_category": row.overall_category,
+            "portfolio_gaps": row.portfolio_gaps,
+            "portfolio_strengths": row.portfolio_strengths
+        }
+    return results
+
+def categorize_strategy(strategy_text, matcher=STRATEGY_MATCHER):
     """
     Categorize and analyze the legal strategy based on text description
     """
     strategy_text = strategy_text.lower()
     
-    # Identify primary strategy approach
-    strategy_keywords = {
-        "procedural": ["procedural", "process", "motion to dismiss", "summary judgment", "jurisdiction"],
-        "substantive": ["substantive", "merits", "elements", "statutory", "precedent"],
-        "settlement": ["settlement", "negotiation", "mediation", "resolution", "compromise"],
-        "aggressive": ["aggressive", "challenge", "attack", "counter", "offensive"],
-        "defensive": ["defensive", "mitigate", "limit", "reduce", "protect"]
-    }
-    
-    # Count keyword matches for each strategy type
-    strategy_scores = {}
-    for strategy, keywords in strategy_keywords.items():
-        score = sum(1 for keyword in keywords if keyword in strategy_text)
-        strategy_scores[strategy] = score
+    # Count keyword matches for each strategy type in a single scan
+    strategy_scores = matcher.counts(strategy_text, lowered=True)
     
     # Determine primary and secondary strategies
     sorted_strategies = sorted(strategy_scores.items(), key=lambda x: x[1], reverse=True)
@@ -501,16 +629,26 @@ def identify_strategy_gaps(strategy_scores, strategy_text):
         
     return gaps
 
-def calculate_win_probability(similar_cases, evidence_strength, strategy_approach):
+def calculate_win_probability(similar_cases, evidence_strength, strategy_approach, case_text=None):
     """
-    Calculate win probability based on similar cases, evidence strength and strategy approach
+    Calculate win probability based on similar cases, evidence strength and strategy approach.
+    Uses the trained outcome model when one is available and case_text is given,
+    otherwise the hand-tuned formula below.
     """
+    outcome_model = get_outcome_model()
+    if outcome_model is not None and case_text is not None:
+        prediction = outcome_model.predict(case_text, evidence_strength, strategy_approach)
+        return {
+            "win_probability": round(prediction["win_probability"]),
+            "base_case_probability": round(prediction["base_case_probability"]),
+            "evidence_contribution": round(prediction["evidence_contribution"], 1),
+            "strategy_contribution": round(prediction["strategy_contribution"], 1)
+        }
+    
     # Base case probability from similar cases
     if similar_cases:
         # Calculate base probability from similar cases
-        win_outcomes = sum(1 for case in similar_cases[:3] if "win" in case["outcome"].lower() 
-                          or "favorable" in case["outcome"].lower() 
-                          or "success" in case["outcome"].lower())
+        win_outcomes = sum(1 for case in similar_cases[:3] if case_outcome_flags(case) & OUTCOME_POSITIVE)
         base_probability = (win_outcomes / min(3, len(similar_cases))) * 100
     else:
         base_probability = 50  # Default to 50% if no similar cases
@@ -577,7 +715,7 @@ def generate_outcome_analysis(win_probability, similar_cases, evidence_strength,
     
     # Add similar case factors
     favorable_cases = [case for case in similar_cases[:3] 
-                      if "win" in case["outcome"].lower() or "favorable" in case["outcome"].lower()]
+                      if case_outcome_flags(case) & (OUTCOME_WIN | OUTCOME_FAVORABLE)]
     if favorable_cases:
         positive_factors.append(f"{len(favorable_cases)} similar cases with favorable outcomes")
     
@@ -602,7 +740,7 @@ def generate_outcome_analysis(win_probability, similar_cases, evidence_strength,
     
     # Add similar case factors
     unfavorable_cases = [case for case in similar_cases[:3] 
-                        if "loss" in case["outcome"].lower() or "unfavorable" in case["outcome"].lower()]
+                        if case_outcome_flags(case) & (OUTCOME_LOSS | OUTCOME_UNFAVORABLE)]
     if unfavorable_cases:
         negative_factors.append(f"{len(unfavorable_cases)} similar cases with unfavorable outcomes")
     
@@ -667,7 +805,7 @@ def generate_strategic_recommendations(win_probability, similar_cases, evidence_
     
     # Case comparison recommendations
     if similar_cases:
-        successful_case = next((case for case in similar_cases if "win" in case["outcome"].lower()), None)
+        successful_case = next((case for case in similar_cases if case_outcome_flags(case) & OUTCOME_WIN), None)
         if successful_case:
             recommendations.append({
                 "category": "Case Comparison",
@@ -703,7 +841,25 @@ def generate_strategic_recommendations(win_probability, similar_cases, evidence_
     
     return recommendations
 
-def analyze_user_evidence_and_strategy(case_details, user_evidence, user_strategy):
+def find_similar_cases_stage(case_facts, retrieval_mode):
+    return find_similar_cases(case_facts, retrieval_mode=retrieval_mode)
+
+# Rule-based analysis stages and the inputs each one depends on
+ANALYSIS_STAGES = [
+    Stage("evidence_strength", assess_evidence_strength, ["user_evidence"]),
+    Stage("strategy_approach", categorize_strategy, ["user_strategy"]),
+    Stage("case_facts", extract_case_facts, ["facts"]),
+    Stage("similar_cases", find_similar_cases_stage, ["case_facts", "retrieval_mode"]),
+    Stage("case_text", outcome_text, ["case_facts", "user_strategy"]),
+    Stage("win_probability", calculate_win_probability,
+          ["similar_cases", "evidence_strength", "strategy_approach", "case_text"]),
+    Stage("outcome_analysis", generate_outcome_analysis,
+          ["win_probability", "similar_cases", "evidence_strength", "strategy_approach"]),
+    Stage("recommendations", generate_strategic_recommendations,
+          ["win_probability", "similar_cases", "evidence_strength", "strategy_approach", "user_evidence"])
+]
+
+def analyze_user_evidence_and_strategy(case_details, user_evidence, user_strategy, retrieval_mode="auto", pipeline=None):
     """
     Analyze user's evidence and legal strategy against the case details
     to predict potential outcomes.
@@ -712,50 +868,340 @@ def analyze_user_evidence_and_strategy(case_details, user_evidence, user_strateg
     case_details (dict): The user's case details
     user_evidence (list): List of evidence items provided by user
     user_strategy (str): User's current legal strategy
+    retrieval_mode (str): Similar-case search mode ("auto", "exact" or "ann")
+    pipeline (IncrementalPipeline): Reuses stages whose inputs are unchanged since its last run
     
     Returns:
     dict: Prediction analysis results
     """
-    # Extract key elements from user inputs
-    evidence_strength = assess_evidence_strength(user_evidence)
-    strategy_approach = categorize_strategy(user_strategy)
-    case_facts = extract_case_facts(case_details)
+    if pipeline is None:
+        pipeline = IncrementalPipeline(ANALYSIS_STAGES, memoize=False)
+    
+    # Only the facts text feeds the analysis; title and type do not
+    facts = case_details.get("facts", "") if isinstance(case_details, dict) else str(case_details)
+    values = pipeline.run(
+        facts=facts,
+        user_evidence=user_evidence,
+        user_strategy=user_strategy,
+        retrieval_mode=retrieval_mode
+    )
     
-    # Find similar cases using TF-IDF and cosine similarity
-    similar_cases = find_similar_cases(case_facts)
+    return {
+        "win_probability": values["win_probability"],
+        "outcome_analysis": values["outcome_analysis"],
+        "evidence_analysis": values["evidence_strength"],
+        "strategy_analysis": values["strategy_approach"],
+        "similar_cases": values["similar_cases"][:5],  # Top 5 similar cases
+        "recommendations": values["recommendations"]
+    }
+
+def render_win_probability(results):
+    """
+    Render the win probability metrics
+    """
+    if "win_probability" not in results:
+        return
     
-    # Calculate predicted outcome probabilities
-    win_probability = calculate_win_probability(
-        similar_cases, 
-        evidence_strength, 
-        strategy_approach
-    )
+    # Win Probability Section
+    st.markdown("## 📈 Outcome Prediction")
+    col1, col2, col3 = st.columns([2, 1, 1])
+
+    with col1:
+        st.metric("Win Probability", f"{results['win_probability']['win_probability']}%")
+        if "outcome_analysis" in results:
+            st.caption(f"{results['outcome_analysis']['outcome_category']}: {results['outcome_analysis']['outcome_description']}")
+
+    with col2:
+        st.metric("Base Case Probability", f"{results['win_probability']['base_case_probability']}%")
+        st.caption("From similar case outcomes")
+
+    with col3:
+        evidence_effect = results['win_probability']['evidence_contribution']
+        strategy_effect = results['win_probability']['strategy_contribution']
+
+        if evidence_effect >= 0:
+            st.metric("Evidence Effect", f"+{evidence_effect}%")
+        else:
+            st.metric("Evidence Effect", f"{evidence_effect}%")
+
+        if strategy_effect >= 0:
+            st.metric("Strategy Effect", f"+{strategy_effect}%")
+        else:
+            st.metric("Strategy Effect", f"{strategy_effect}%")
+
+def render_key_factors(results):
+    """
+    Render the key positive and negative factors
+    """
+    if "outcome_analysis" not in results:
+        return
     
-    # Generate detailed analysis
-    outcome_analysis = generate_outcome_analysis(
-        win_probability, 
-        similar_cases, 
-        evidence_strength, 
-        strategy_approach
-    )
+    # Key factors
+    st.markdown("### Key Factors")
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.markdown("#### Positive Factors")
+        for factor in results['outcome_analysis']['key_positive_factors']:
+            st.markdown(f"✅ {factor}")
+
+    with col2:
+        st.markdown("#### Negative Factors")
+        for factor in results['outcome_analysis']['key_negative_factors']:
+            st.markdown(f"⚠️ {factor}")
+
+def render_evidence_analysis(results):
+    """
+    Render the evidence portfolio analysis
+    """
+    if "evidence_analysis" not in results:
+        return
     
-    # Generate recommendations
-    recommendations = generate_strategic_recommendations(
-        win_probability,
-        similar_cases,
-        evidence_strength,
-        strategy_approach,
-        user_evidence
-    )
+    # Evidence Analysis
+    st.markdown("## 🧾 Evidence Analysis")
+    col1, col2 = st.columns([3, 1])
+
+    with col1:
+        st.markdown(f"Overall Portfolio Strength: **{results['evidence_analysis']['overall_category']}** ({results['evidence_analysis']['overall_score']:.1f}/100)")
+
+    with col2:
+        # Small pie chart of evidence types could go here in a real implementation
+        pass
+
+    # Evidence table
+    st.markdown("### Evidence Items")
+    for item in results['evidence_analysis']['evidence_items']:
+        col1, col2, col3 = st.columns([3, 1, 2])
+
+        with col1:
+            st.markdown(f"**{item['description'][:50]}{'...' if len(item['description']) > 50 else ''}**")
+            st.caption(f"Type: {item['type']}")
+
+        with col2:
+            # Color based on strength
+            color = "green" if item['strength_score'] >= 70 else "orange" if item['strength_score'] >= 50 else "red"
+            st.markdown(f"<span style='color:{color};font-weight:bold;'>{item['category']}</span>", unsafe_allow_html=True)
+            st.caption(f"Score: {item['strength_score']:.1f}/100")
+
+        with col3:
+            if item['improvement_suggestions']:
+                st.caption("Suggestion:")
+                st.markdown(f"✏️ {item['improvement_suggestions'][0]}")
+
+        st.markdown("---")
+
+    # Portfolio gaps and strengths
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.markdown("#### Portfolio Gaps")
+        for gap in results['evidence_analysis']['portfolio_gaps']:
+            st.markdown(f"🔍 {gap}")
+
+    with col2:
+        st.markdown("#### Portfolio Strengths")
+        for strength in results['evidence_analysis']['portfolio_strengths']:
+            st.markdown(f"💪 {strength}")
+
+def render_strategy_analysis(results):
+    """
+    Render the strategy analysis
+    """
+    if "strategy_analysis" not in results:
+        return
     
-    return {
-        "win_probability": win_probability,
-        "outcome_analysis": outcome_analysis,
-        "evidence_analysis": evidence_strength,
-        "strategy_analysis": strategy_approach,
-        "similar_cases": similar_cases[:5],  # Top 5 similar cases
-        "recommendations": recommendations
-    }
+    # Strategy Analysis
+    st.markdown("## 📊 Strategy Analysis")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.markdown(f"**Primary Approach:** {results['strategy_analysis']['primary_strategy'].title()}")
+        if results['strategy_analysis']['secondary_strategy']:
+            st.markdown(f"**Secondary Approach:** {results['strategy_analysis']['secondary_strategy'].title()}")
+        st.markdown(f"**Balance:** {results['strategy_analysis']['strategy_balance']}")
+
+    with col2:
+        st.markdown("#### Strategy Effectiveness")
+        st.markdown(f"⚡ {results['strategy_analysis']['strategy_effectiveness']}")
+
+        st.markdown("#### Strategy Gaps")
+        for gap in results['strategy_analysis']['strategy_gaps']:
+            st.markdown(f"⚠️ {gap}")
+
+def render_similar_cases(results):
+    """
+    Render tabs for the most similar cases
+    """
+    if "similar_cases" not in results:
+        return
+    
+    # Similar Cases
+    st.markdown("## 📚 Similar Cases")
+
+    # Create tabs for each similar case
+    if results['similar_cases']:
+        tabs = st.tabs([f"{case['title']}" for case in results['similar_cases'][:3]])
+
+        for i, tab in enumerate(tabs):
+            case = results['similar_cases'][i]
+            with tab:
+                col1, col2 = st.columns([1, 1])
+
+                with col1:
+                    st.markdown(f"**Outcome:** {case['outcome']}")
+                    st.markdown(f"**Similarity:** {case['similarity']:.2f}/1.0")
+
+                with col2:
+                    st.markdown("**Key Factors:**")
+                    for factor in case['key_factors']:
+                        st.markdown(f"• {factor}")
+
+                st.markdown(f"**Evidence Strength:** {case['evidence_strength']}")
+                st.markdown(f"**Strategy Used:** {case['strategy_used']}")
+
+def render_recommendations(results):
+    """
+    Render recommendations grouped by priority
+    """
+    if "recommendations" not in results:
+        return
+    
+    # Strategic Recommendations
+    st.markdown("## 📋 Strategic Recommendations")
+
+    # Group recommendations by priority in one pass
+    recommendations = Recommendations.from_list(results['recommendations'])
+    critical_recs = recommendations.with_priority('Critical')
+    high_recs = recommendations.with_priority('High')
+    other_recs = recommendations.without_priority('Critical', 'High')
+
+    # Display critical recommendations
+    if critical_recs:
+        st.markdown("### 🚨 Critical Priority")
+        for rec in critical_recs:
+            st.markdown(f"**{rec.category}: {rec.recommendation}**")
+            st.markdown(f"_{rec.rationale}_")
+            st.markdown("---")
+
+    # Display high priority recommendations
+    if high_recs:
+        st.markdown("### ⚠️ High Priority")
+        for rec in high_recs:
+            st.markdown(f"**{rec.category}: {rec.recommendation}**")
+            st.markdown(f"_{rec.rationale}_")
+            st.markdown("---")
+
+    # Display other recommendations
+    if other_recs:
+        st.markdown("### 📝 Additional Recommendations")
+        for rec in other_recs:
+            st.markdown(f"**{rec.category} ({rec.priority}): {rec.recommendation}**")
+            st.markdown(f"_{rec.rationale}_")
+            st.markdown("---")
+
+def render_judicial_considerations(results):
+    """
+    Render the judicial considerations
+    """
+    if "outcome_analysis" not in results:
+        return
+    
+    # Judicial considerations
+    st.markdown("### ⚖️ Judicial Considerations")
+    for consideration in results['outcome_analysis']['judicial_considerations']:
+        st.markdown(f"• {consideration}")
+
+# Result views in display order, and the views to refresh when a section arrives
+RESULT_VIEWS = [
+    render_win_probability,
+    render_key_factors,
+    render_evidence_analysis,
+    render_strategy_analysis,
+    render_similar_cases,
+    render_recommendations,
+    render_judicial_considerations
+]
+SECTION_VIEWS = {
+    "win_probability": [render_win_probability],
+    "outcome_analysis": [render_win_probability, render_key_factors, render_judicial_considerations],
+    "evidence_analysis": [render_evidence_analysis],
+    "strategy_analysis": [render_strategy_analysis],
+    "similar_cases": [render_similar_cases],
+    "recommendations": [render_recommendations]
+}
+
+# Evidence table page size and import warnings shown
+EVIDENCE_PAGE_SIZE = 50
+MAX_IMPORT_ERRORS = 20
+
+def evidence_table(evidence_items):
+    """
+    Evidence items with their type and strength, scored in one pass, for display
+    """
+    items, _ = assess_evidence_portfolios(pd.DataFrame(evidence_items).assign(portfolio_id=0))
+    return pd.DataFrame({
+        "#": np.arange(1, len(items) + 1),
+        "Description": items["description"],
+        "Type": items["type"],
+        "Reliability": items["reliability"],
+        "Relevance": items["relevance"],
+        "Strength": items["strength_score"],
+        "Category": items["category"]
+    })
+
+def render_performance(last_trace):
+    """
+    Show per-stage timings and any captured profile for one trace
+    """
+    if last_trace is None:
+        st.caption("Run an analysis to see stage timings.")
+        return
+    
+    st.metric("Last analysis", f"{last_trace.duration * 1000:.0f} ms")
+    stages = pd.DataFrame([
+        {"Stage": name, "Calls": totals["calls"], "Time (ms)": round(totals["total_ms"], 2)}
+        for name, totals in last_trace.summary().items()
+    ])
+    st.dataframe(stages, hide_index=True, use_container_width=True)
+    
+    if last_trace.memory_peak_mb is not None:
+        st.caption(f"Peak traced memory: {last_trace.memory_peak_mb:.1f} MB")
+        st.code("\n".join(last_trace.memory_top))
+    if last_trace.profile:
+        st.code(last_trace.profile)
+    
+    # Export the process-wide totals for a Prometheus textfile collector
+    if st.button("Export Prometheus metrics"):
+        st.caption(f"Metrics written to {export_prometheus()}")
+
+def render_saved_analyses(store):
+    """
+    Dashboard of stored analyses, read from the store's summary columns
+    without re-running any analysis
+    """
+    summary = store.summary()
+    if not summary:
+        st.caption("Analyses are saved here once they complete.")
+        return
+    
+    st.dataframe(pd.DataFrame([
+        {"Case type": row["case_type"] or "Unspecified", "Analyses": row["analyses"],
+         "Avg. win %": None if row["average_win_probability"] is None else round(row["average_win_probability"], 1)}
+        for row in summary
+    ]), hide_index=True, use_container_width=True)
+    
+    saved = store.list_analyses(limit=200)
+    labels = {row["id"]: f"#{row['id']} {row['title'] or 'Untitled'} ({row['win_probability'] or 0:.0f}%)"
+              for row in saved}
+    selected = st.selectbox("Saved analysis", list(labels), format_func=labels.get)
+    if st.button("Open Saved Analysis"):
+        record = store.get_analysis(selected)
+        # Restore the inputs so the case can be edited and re-analyzed
+        st.session_state.case_facts = record["case"]["facts"]
+        st.session_state.evidence_items = record["evidence"]
+        st.session_state.strategy = record["strategy"]
+        st.session_state.saved_analysis = record
 
 # Main application function
 def main():
@@ -765,6 +1211,9 @@ def main():
         layout="wide"
     )
     
+    # Load shared resources once per process
+    warm_up_resources()
+    
     st.title("⚖️ Legal Case Prediction Analysis Tool")
     st.markdown("""
     This application helps legal professionals analyze cases and predict potential outcomes 
@@ -774,11 +1223,17 @@ def main():
     # Initialize session state for evidence items if not exists
     if 'evidence_items' not in st.session_state:
         st.session_state.evidence_items = []
+    
+    # Per-session pipeline so re-analysis only recomputes stages whose inputs changed
+    if 'analysis_pipeline' not in st.session_state:
+        st.session_state.analysis_pipeline = IncrementalPipeline(ANALYSIS_STAGES)
         
     # Clear button in sidebar
     st.sidebar.title("Actions")
     if st.sidebar.button("Clear All Data"):
         st.session_state.evidence_items = []
+        st.session_state.analysis_pipeline.clear()
+        st.session_state.pop("saved_analysis", None)
         st.rerun()
     
     # Sidebar: Gemini toggle
@@ -786,44 +1241,128 @@ def main():
     use_gemini = st.sidebar.checkbox("Use Gemini AI", value=True, 
                                     help="Enable Gemini AI for enhanced predictions.")
     
-    # Load Gemini model if selected
-    model = None
+    # Load the Gemini models if selected
+    models = []
     if use_gemini:
+        model_spec = st.sidebar.text_input("Gemini models", value=st.secrets.get("GEMINI_MODELS", DEFAULT_MODELS),
+                                           help="Comma-separated model names with optional ensemble weights, "
+                                                "e.g. gemini-pro:1, gemini-1.5-flash:0.5")
         try:
-            model = configure_gemini()
+            models = configure_gemini(parse_model_weights(model_spec))
             st.sidebar.success("✅ Gemini API configured successfully.")
         except Exception as e:
             st.sidebar.error(f"⚠️ Gemini configuration failed: {e}")
             use_gemini = False
+    
+    routing = "never"
+    if use_gemini:
+        routing = st.sidebar.selectbox(
+            "Routing", ROUTING_MODES,
+            format_func=lambda mode: {"auto": "Rule engine first, Gemini for hard cases", "always": "Always use Gemini",
+                                      "never": "Rule engine only"}[mode],
+            help="Automatic routing only calls Gemini when the rule engine is uncertain or the case is complex.")
+    
+    stream_output = use_gemini and len(models) == 1 and st.sidebar.checkbox(
+        "Stream Gemini output", value=True, help="Show each part of the analysis as soon as it is generated.")
+    
+    # Gemini response cache statistics
+    response_cache = load_response_cache()
+    if use_gemini:
+        stats = response_cache.stats
+        st.sidebar.caption(
+            f"Response cache: {stats['memory_hits'] + stats['disk_hits']} hits, "
+            f"{stats['misses']} misses ({response_cache.hit_rate():.0%} hit rate)"
+        )
+        if st.sidebar.button("Clear Response Cache"):
+            response_cache.clear()
+    
+    # Sidebar: saved analyses
+    analysis_store = load_analysis_store()
+    with st.sidebar.expander("Saved Analyses", expanded=False):
+        render_saved_analyses(analysis_store)
+    
+    # Sidebar: performance panel (filled in after the analysis runs)
+    performance_panel = st.sidebar.expander("Performance", expanded=False)
+    capture_mode = performance_panel.selectbox(
+        "Profiling", CAPTURE_MODES,
+        format_func=lambda mode: {None: "Timings only", "cprofile": "cProfile", "tracemalloc": "Memory (tracemalloc)"}[mode],
+        help="Also capture a CPU profile or peak memory for the next analysis.")
 
     # Case Details
     with st.expander("📝 Case Details", expanded=True):
         case_title = st.text_input("Case Title / Description")
         case_type = st.selectbox("Case Type", 
                                 ["Select a case type...", "Criminal", "Civil", "Constitutional", "Tax", "Family", "Corporate", "Labor"])
-        case_details = st.text_area("Case Facts (Detailed)", height=150)
+        
+        # Import case facts and exhibits from uploaded documents
+        uploaded_documents = st.file_uploader("Upload case documents (PDF or text)", type=["pdf", "txt"],
+                                              accept_multiple_files=True)
+        if uploaded_documents and st.button("Import Documents"):
+            progress_bar = st.progress(0.0, text="Reading documents...")
+            
+            def update_progress(name, page_number, page_count):
+                # Only redraw when the visible percentage changes
+                if page_number == page_count or page_number * 100 // page_count != (page_number - 1) * 100 // page_count:
+                    progress_bar.progress(page_number / page_count, text=f"{name}: page {page_number} of {page_count}")
+            
+            imported = ingest_documents(uploaded_documents, progress=update_progress)
+            progress_bar.empty()
+            
+            existing_facts = st.session_state.get("case_facts", "")
+            st.session_state.case_facts = "\n\n".join(part for part in [existing_facts, imported["facts"]] if part)
+            st.session_state.evidence_items.extend(imported["evidence"])
+            st.success(f"Imported {imported['pages']} pages: {len(extract_case_facts(imported['facts']))} facts "
+                       f"and {len(imported['evidence'])} evidence items.")
+            if imported["truncated"]:
+                st.warning("Documents were too long to include in full; case facts were truncated.")
+        
+        case_details = st.text_area("Case Facts (Detailed)", height=150, key="case_facts")
 
     # Evidence Section
     with st.expander("🧾 Evidence Portfolio", expanded=True):
         st.write("Add evidence items (existing or planned).")
         
-        # Display current evidence
+        # Bulk import of an evidence list
+        evidence_file = st.file_uploader("Import evidence list (CSV, Excel or JSON)", type=["csv", "xlsx", "json"],
+                                         help="One row per item with description, reliability and relevance (1-5) columns.")
+        if evidence_file and st.button("Import Evidence List"):
+            try:
+                imported_evidence, rejected = validate_evidence_table(read_evidence_table(evidence_file))
+            except (ValueError, ImportError) as e:
+                st.error(f"Could not read {evidence_file.name}: {e}")
+            else:
+                if len(imported_evidence):
+                    # Score the whole import in one vectorized pass
+                    _, imported_portfolio = assess_evidence_portfolios(imported_evidence.assign(portfolio_id=0))
+                    st.session_state.evidence_items = (st.session_state.evidence_items
+                                                       + imported_evidence.to_dict("records"))
+                    st.success(f"Imported {len(imported_evidence)} evidence items (average strength "
+                               f"{imported_portfolio['overall_score'].iloc[0]:.0f}/100).")
+                for error in rejected[:MAX_IMPORT_ERRORS]:
+                    st.warning(f"Skipped {error}")
+                if len(rejected) > MAX_IMPORT_ERRORS:
+                    st.warning(f"Skipped {len(rejected) - MAX_IMPORT_ERRORS} more invalid rows.")
+        
+        # Display current evidence, one page of the table at a time
         if st.session_state.evidence_items:
             st.markdown("### Current Evidence:")
-            for i, item in enumerate(st.session_state.evidence_items):
-                col1, col2, col3 = st.columns([4, 1, 1])
-                with col1:
-                    st.markdown(f"**{i+1}.** {item['description']}")
-                with col2:
-                    st.markdown(f"Reliability: {item['reliability']}/5")
-                with col3:
-                    st.markdown(f"Relevance: {item['relevance']}/5")
-                    
-                # Add delete button for each evidence item
-                if st.button(f"Remove", key=f"remove_{i}"):
-                    st.session_state.evidence_items.pop(i)
-                    st.rerun()
-                st.markdown("---")
+            table = evidence_table(st.session_state.evidence_items)
+            page_count = (len(table) - 1) // EVIDENCE_PAGE_SIZE + 1
+            page = 1
+            if page_count > 1:
+                page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1)
+            start = (page - 1) * EVIDENCE_PAGE_SIZE
+            selection = st.dataframe(table.iloc[start:start + EVIDENCE_PAGE_SIZE], hide_index=True,
+                                     use_container_width=True, on_select="rerun", selection_mode="multi-row",
+                                     key=f"evidence_page_{page}")
+            
+            # Remove the rows selected on this page
+            selected_rows = selection.selection.rows
+            if selected_rows and st.button(f"Remove {len(selected_rows)} Selected"):
+                removed = {start + row for row in selected_rows}
+                st.session_state.evidence_items = [item for i, item in enumerate(st.session_state.evidence_items)
+                                                   if i not in removed]
+                st.rerun()
 
         # Form to add new evidence
         with st.form("evidence_form"):
@@ -851,7 +1390,7 @@ def main():
 
     # Legal Strategy Section
     with st.expander("📊 Legal Strategy", expanded=True):
-        strategy = st.text_area("Describe your current legal strategy", height=150,
+        strategy = st.text_area("Describe your current legal strategy", height=150, key="strategy",
                               placeholder="Detail your approach, including procedural strategy, substantive arguments, settlement considerations, etc.")
 
     # Analysis Button
@@ -863,7 +1402,10 @@ def main():
         if not case_details or not strategy or not st.session_state.evidence_items:
             st.error("Please complete all sections: Case Details, Evidence Portfolio, and Legal Strategy.")
         else:
-            with st.spinner("Analyzing your case..."):
+            with st.spinner("Analyzing your case..."), trace("analyze_case", capture=capture_mode) as analysis_trace:
+                # Timings are finalised when the trace closes; keep this session's own trace
+                st.session_state.last_trace = analysis_trace
+                
                 # Prepare case data for analysis
                 case_data = {
                     "title": case_title,
@@ -871,180 +1413,78 @@ def main():
                     "facts": case_details
                 }
                 
-                # Analyze using either Gemini or fallback function
-                if use_gemini and model:
-                    analysis_results = analyze_with_gemini(model, case_data, st.session_state.evidence_items, strategy)
-                else:
-                    analysis_results = analyze_user_evidence_and_strategy(case_data, st.session_state.evidence_items, strategy)
-                
-                # Display results
-                st.success("Analysis Complete!")
+                # Route: the rule engine answers first, and Gemini is only asked
+                # when the routing mode requires it or the case looks hard
+                evidence_items = st.session_state.evidence_items
+                rule_result = None
+                reasons = ["routing set to always use Gemini"] if use_gemini and routing == "always" else []
+                if not reasons:
+                    rule_result = analyze_user_evidence_and_strategy(case_data, evidence_items, strategy,
+                                                                      pipeline=st.session_state.analysis_pipeline)
+                    if use_gemini and routing == "auto":
+                        reasons = escalation_reasons(rule_result, case_data, evidence_items)
                 
-                # Win Probability Section
-                st.markdown("## 📈 Outcome Prediction")
-                col1, col2, col3 = st.columns([2, 1, 1])
-                
-                with col1:
-                    st.metric("Win Probability", f"{analysis_results['win_probability']['win_probability']}%")
-                    st.caption(f"{analysis_results['outcome_analysis']['outcome_category']}: {analysis_results['outcome_analysis']['outcome_description']}")
-                    
-                with col2:
-                    st.metric("Base Case Probability", f"{analysis_results['win_probability']['base_case_probability']}%")
-                    st.caption("From similar case outcomes")
-                    
-                with col3:
-                    evidence_effect = analysis_results['win_probability']['evidence_contribution']
-                    strategy_effect = analysis_results['win_probability']['strategy_contribution']
-                    
-                    if evidence_effect >= 0:
-                        st.metric("Evidence Effect", f"+{evidence_effect}%")
-                    else:
-                        st.metric("Evidence Effect", f"{evidence_effect}%")
-                        
-                    if strategy_effect >= 0:
-                        st.metric("Strategy Effect", f"+{strategy_effect}%")
+                if not reasons:
+                    sections = rule_result.items()
+                    source = "rules"
+                    route_note = "Answered by the rule engine."
+                elif len(models) == 1:
+                    model = models[0][0]
+                    if stream_output:
+                        sections = stream_gemini_analysis(model, case_data, evidence_items, strategy,
+                                                          cache=response_cache, rule_result=rule_result)
                     else:
-                        st.metric("Strategy Effect", f"{strategy_effect}%")
-                
-                # Key factors
-                st.markdown("### Key Factors")
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.markdown("#### Positive Factors")
-                    for factor in analysis_results['outcome_analysis']['key_positive_factors']:
-                        st.markdown(f"✅ {factor}")
-                        
-                with col2:
-                    st.markdown("#### Negative Factors")
-                    for factor in analysis_results['outcome_analysis']['key_negative_factors']:
-                        st.markdown(f"⚠️ {factor}")
-                
-                # Evidence Analysis
-                st.markdown("## 🧾 Evidence Analysis")
-                col1, col2 = st.columns([3, 1])
-                
-                with col1:
-                    st.markdown(f"Overall Portfolio Strength: **{analysis_results['evidence_analysis']['overall_category']}** ({analysis_results['evidence_analysis']['overall_score']:.1f}/100)")
-                    
-                with col2:
-                    # Small pie chart of evidence types could go here in a real implementation
-                    pass
-                
-                # Evidence table
-                st.markdown("### Evidence Items")
-                for item in analysis_results['evidence_analysis']['evidence_items']:
-                    col1, col2, col3 = st.columns([3, 1, 2])
-                    
-                    with col1:
-                        st.markdown(f"**{item['description'][:50]}{'...' if len(item['description']) > 50 else ''}**")
-                        st.caption(f"Type: {item['type']}")
-                        
-                    with col2:
-                        # Color based on strength
-                        color = "green" if item['strength_score'] >= 70 else "orange" if item['strength_score'] >= 50 else "red"
-                        st.markdown(f"<span style='color:{color};font-weight:bold;'>{item['category']}</span>", unsafe_allow_html=True)
-                        st.caption(f"Score: {item['strength_score']:.1f}/100")
-                        
-                    with col3:
-                        if item['improvement_suggestions']:
-                            st.caption("Suggestion:")
-                            st.markdown(f"✏️ {item['improvement_suggestions'][0]}")
-                    
-                    st.markdown("---")
-                
-                # Portfolio gaps and strengths
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.markdown("#### Portfolio Gaps")
-                    for gap in analysis_results['evidence_analysis']['portfolio_gaps']:
-                        st.markdown(f"🔍 {gap}")
-                        
-                with col2:
-                    st.markdown("#### Portfolio Strengths")
-                    for strength in analysis_results['evidence_analysis']['portfolio_strengths']:
-                        st.markdown(f"💪 {strength}")
-                
-                # Strategy Analysis
-                st.markdown("## 📊 Strategy Analysis")
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.markdown(f"**Primary Approach:** {analysis_results['strategy_analysis']['primary_strategy'].title()}")
-                    if analysis_results['strategy_analysis']['secondary_strategy']:
-                        st.markdown(f"**Secondary Approach:** {analysis_results['strategy_analysis']['secondary_strategy'].title()}")
-                    st.markdown(f"**Balance:** {analysis_results['strategy_analysis']['strategy_balance']}")
-                    
-                with col2:
-                    st.markdown("#### Strategy Effectiveness")
-                    st.markdown(f"⚡ {analysis_results['strategy_analysis']['strategy_effectiveness']}")
-                    
-                    st.markdown("#### Strategy Gaps")
-                    for gap in analysis_results['strategy_analysis']['strategy_gaps']:
-                        st.markdown(f"⚠️ {gap}")
-                
-                # Similar Cases
-                st.markdown("## 📚 Similar Cases")
-                
-                # Create tabs for each similar case
-                if analysis_results['similar_cases']:
-                    tabs = st.tabs([f"{case['title']}" for case in analysis_results['similar_cases'][:3]])
-                    
-                    for i, tab in enumerate(tabs):
-                        case = analysis_results['similar_cases'][i]
-                        with tab:
-                            col1, col2 = st.columns([1, 1])
-                            
-                            with col1:
-                                st.markdown(f"**Outcome:** {case['outcome']}")
-                                st.markdown(f"**Similarity:** {case['similarity']:.2f}/1.0")
-                                
-                            with col2:
-                                st.markdown("**Key Factors:**")
-                                for factor in case['key_factors']:
-                                    st.markdown(f"• {factor}")
-                                    
-                            st.markdown(f"**Evidence Strength:** {case['evidence_strength']}")
-                            st.markdown(f"**Strategy Used:** {case['strategy_used']}")
-                
-                # Strategic Recommendations
-                st.markdown("## 📋 Strategic Recommendations")
-                
-                # Group recommendations by priority
-                critical_recs = [r for r in analysis_results['recommendations'] if r['priority'] == 'Critical']
-                high_recs = [r for r in analysis_results['recommendations'] if r['priority'] == 'High']
-                other_recs = [r for r in analysis_results['recommendations'] if r['priority'] not in ['Critical', 'High']]
-                
-                # Display critical recommendations
-                if critical_recs:
-                    st.markdown("### 🚨 Critical Priority")
-                    for rec in critical_recs:
-                        st.markdown(f"**{rec['category']}: {rec['recommendation']}**")
-                        st.markdown(f"_{rec['rationale']}_")
-                        st.markdown("---")
+                        sections = analyze_with_gemini(model, case_data, evidence_items, strategy,
+                                                       cache=response_cache, rule_result=rule_result).items()
+                    source = model.model_name
+                    route_note = f"Sent to {model.model_name}: {', '.join(reasons)}."
+                else:
+                    if rule_result is None:
+                        rule_result = analyze_user_evidence_and_strategy(case_data, evidence_items, strategy,
+                                                                          pipeline=st.session_state.analysis_pipeline)
+                    combined, ensemble = ensemble_analysis(models, case_data, evidence_items, strategy, rule_result,
+                                                           cache=response_cache)
+                    for error in ensemble["errors"]:
+                        st.warning(f"Gemini model {error}")
+                    sections = combined.items()
+                    source = "ensemble"
+                    route_note = (f"Ensemble of {', '.join(ensemble['models']) or 'no models (rule engine used)'}: "
+                                  f"{', '.join(reasons)}.")
                 
-                # Display high priority recommendations
-                if high_recs:
-                    st.markdown("### ⚠️ High Priority")
-                    for rec in high_recs:
-                        st.markdown(f"**{rec['category']}: {rec['recommendation']}**")
-                        st.markdown(f"_{rec['rationale']}_")
-                        st.markdown("---")
+                # Placeholders for each result view, filled as sections arrive
+                status = st.empty()
+                placeholders = {view: st.empty() for view in RESULT_VIEWS}
+                results = {}
+                for section, value in sections:
+                    results[section] = value
+                    for view in SECTION_VIEWS.get(section, []):
+                        with span(f"render.{view.__name__}"), placeholders[view].container():
+                            view(results)
                 
-                # Display other recommendations
-                if other_recs:
-                    st.markdown("### 📝 Additional Recommendations")
-                    for rec in other_recs:
-                        st.markdown(f"**{rec['category']} ({rec['priority']}): {rec['recommendation']}**")
-                        st.markdown(f"_{rec['rationale']}_")
-                        st.markdown("---")
+                status.success("Analysis Complete!")
+                st.caption(route_note)
                 
-                # Judicial considerations
-                st.markdown("### ⚖️ Judicial Considerations")
-                for consideration in analysis_results['outcome_analysis']['judicial_considerations']:
-                    st.markdown(f"• {consideration}")
+                # Save the analysis with its inputs for the dashboard
+                try:
+                    with span("store.save"):
+                        saved_case = dict(case_data, type="" if case_type.startswith("Select") else case_type)
+                        analysis_store.save_analysis({"case": saved_case, "evidence": evidence_items,
+                                                      "strategy": strategy, "result": results, "source": source})
+                    st.session_state.pop("saved_analysis", None)
+                except Exception as e:
+                    st.warning(f"Analysis could not be saved: {e}")
+    
+    # Show an opened saved analysis as stored, without recomputing it
+    elif "saved_analysis" in st.session_state:
+        record = st.session_state.saved_analysis
+        st.info(f"Saved analysis #{record['id']} ({record['source']}): "
+                f"{record['case']['title'] or 'Untitled'}")
+        for view in RESULT_VIEWS:
+            view(record["result"])
+    
+    # Performance panel: stage timings of this session's latest analysis
+    with performance_panel:
+        render_performance(st.session_state.get("last_trace"))
 
 # Run the app
 if __name__ == "__main__":
@@ -0,0 +1,188 @@
+import os
+import json
+import numpy as np
+import joblib
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from case_index import OUTCOME_LOSS, OUTCOME_POSITIVE, OUTCOME_UNFAVORABLE, outcome_flags
+
+# Location of the trained outcome model (override with OUTCOME_MODEL_PATH)
+DEFAULT_MODEL_PATH = os.environ.get("OUTCOME_MODEL_PATH", os.path.join("data", "outcome_model.joblib"))
+
+EVIDENCE_TYPES = ["documentary", "testimonial", "physical", "expert", "other"]
+STRATEGY_TYPES = ["procedural", "substantive", "settlement", "aggressive", "defensive"]
+
+EVIDENCE_FEATURES = (["overall_score", "item_count", "strong_share", "weak_share"]
+                     + [f"type_{evidence_type}" for evidence_type in EVIDENCE_TYPES])
+STRATEGY_FEATURES = [f"strategy_{strategy}" for strategy in STRATEGY_TYPES] + ["strategy_max"]
+
+
+def evidence_features(evidence_strength):
+    """
+    Numeric features from the output of assess_evidence_strength
+    """
+    items = evidence_strength["evidence_items"]
+    count = len(items)
+    features = [
+        evidence_strength["overall_score"] / 100,
+        np.log1p(count),
+        sum(item["strength_score"] >= 70 for item in items) / count if count else 0,
+        sum(item["strength_score"] < 60 for item in items) / count if count else 0
+    ]
+    for evidence_type in EVIDENCE_TYPES:
+        features.append(sum(item["type"] == evidence_type for item in items) / count if count else 0)
+    return features
+
+
+def strategy_features(strategy_approach):
+    """
+    Numeric features from the output of categorize_strategy
+    """
+    scores = strategy_approach["strategy_scores"]
+    features = [scores.get(strategy, 0) for strategy in STRATEGY_TYPES]
+    features.append(max(scores.values()) if scores else 0)
+    return features
+
+
+def outcome_text(case_facts, strategy_text):
+    """
+    Text the model reads for a case: its extracted facts and the strategy
+    """
+    return " ".join(case_facts) + " " + strategy_text
+
+
+def is_win(outcome):
+    """
+    Label an outcome as a win: a positive term and no "loss" or "unfavorable"
+    """
+    if isinstance(outcome, (bool, int, float)):
+        return bool(outcome)
+    flags = outcome_flags(str(outcome).lower())
+    return bool(flags & OUTCOME_POSITIVE) and not flags & (OUTCOME_UNFAVORABLE | OUTCOME_LOSS)
+
+
+class OutcomeModel:
+    """
+    Logistic regression over TF-IDF case text plus evidence and strategy features.
+
+    The linear model lets the predicted win probability be split into the same
+    base case / evidence / strategy parts as the rule-based formula.
+    """
+
+    def __init__(self, vectorizer, classifier):
+        self.vectorizer = vectorizer
+        self.classifier = classifier
+        self.n_text_features = len(vectorizer.vocabulary_)
+
+    @classmethod
+    def train(cls, texts, evidence_rows, strategy_rows, labels, C=1.0):
+        """
+        Fit the model from case texts, feature rows and win/loss labels
+        """
+        vectorizer = TfidfVectorizer(stop_words="english", sublinear_tf=True, min_df=2,
+                                     max_features=50000, dtype=np.float32)
+        text_matrix = vectorizer.fit_transform(texts)
+        numeric = np.hstack([np.asarray(evidence_rows, dtype=np.float32),
+                             np.asarray(strategy_rows, dtype=np.float32)])
+        matrix = sparse.hstack([text_matrix, sparse.csr_matrix(numeric)]).tocsr()
+        classifier = LogisticRegression(C=C, max_iter=1000, class_weight="balanced")
+        classifier.fit(matrix, np.asarray(labels, dtype=int))
+        return cls(vectorizer, classifier)
+
+    def predict(self, text, evidence_strength, strategy_approach):
+        """
+        Predict win probability and its base case / evidence / strategy parts (0-100)
+        """
+        weights = self.classifier.coef_[0]
+        text_weights = weights[:self.n_text_features]
+        evidence_weights = weights[self.n_text_features:self.n_text_features + len(EVIDENCE_FEATURES)]
+        strategy_weights = weights[self.n_text_features + len(EVIDENCE_FEATURES):]
+
+        text_vector = self.vectorizer.transform([text])
+        base_logit = float(self.classifier.intercept_[0]) + float((text_vector @ text_weights)[0])
+        evidence_logit = float(np.dot(evidence_weights, evidence_features(evidence_strength)))
+        strategy_logit = float(np.dot(strategy_weights, strategy_features(strategy_approach)))
+
+        base = float(_sigmoid(base_logit)) * 100
+        with_evidence = float(_sigmoid(base_logit + evidence_logit)) * 100
+        total = float(_sigmoid(base_logit + evidence_logit + strategy_logit)) * 100
+        return {
+            "win_probability": total,
+            "base_case_probability": base,
+            "evidence_contribution": with_evidence - base,
+            "strategy_contribution": total - with_evidence
+        }
+
+    def save(self, path=DEFAULT_MODEL_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        joblib.dump(self, path)
+
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+_default_model = None
+_default_model_loaded = False
+
+
+def get_outcome_model(path=None):
+    """
+    Return the process-wide trained model, or None if none has been trained
+    """
+    global _default_model, _default_model_loaded
+    if not _default_model_loaded or path is not None:
+        path = path or DEFAULT_MODEL_PATH
+        _default_model = joblib.load(path) if os.path.isfile(path) else None
+        _default_model_loaded = True
+    return _default_model
+
+
+def set_outcome_model(model):
+    """
+    Replace the process-wide model; None falls back to the rule-based formula
+    """
+    global _default_model, _default_model_loaded
+    _default_model = model
+    _default_model_loaded = True
+
+
+def train_from_file(path):
+    """
+    Train a model from a labelled JSONL file of historical cases.
+
+    Each line needs facts, evidence (list of evidence dicts), strategy and
+    either won (true/false) or outcome (text such as "Win at trial").
+    """
+    from main import assess_evidence_strength, categorize_strategy, extract_case_facts
+
+    texts, evidence_rows, strategy_rows, labels = [], [], [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            case = json.loads(line)
+            strategy = case.get("strategy", "")
+            texts.append(outcome_text(extract_case_facts(case.get("facts", "")), strategy))
+            evidence_rows.append(evidence_features(assess_evidence_strength(case.get("evidence", []))))
+            strategy_rows.append(strategy_features(categorize_strategy(strategy)))
+            labels.append(is_win(case["won"] if "won" in case else case.get("outcome", "")))
+    return OutcomeModel.train(texts, evidence_rows, strategy_rows, labels)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the win-probability model from labelled cases")
+    parser.add_argument("cases", help="JSONL file of labelled historical cases")
+    parser.add_argument("output", nargs="?", default=DEFAULT_MODEL_PATH)
+    args = parser.parse_args()
+
+    # Import through the module name so the pickled model loads from main.py
+    from outcome_model import train_from_file as train
+    model = train(args.cases)
+    model.save(args.output)
+    print(f"Trained outcome model on {args.cases} and saved it to {args.output}")
@@ -0,0 +1,185 @@
+import os
+import json
+import math
+import functools
+
+from segmenter import iter_sentences
+
+# Input token budget for one analysis prompt (override with GEMINI_PROMPT_TOKENS)
+DEFAULT_PROMPT_TOKENS = int(os.environ.get("GEMINI_PROMPT_TOKENS", 6000))
+
+# Rough English/legal text average; close enough for budgeting without a tokenizer call
+CHARS_PER_TOKEN = 4
+
+# Shares of the budget left after the preamble; facts also get whatever the others leave unused
+EVIDENCE_SHARE = 0.3
+STRATEGY_SHARE = 0.15
+MAX_EVIDENCE_CHARS = 300
+
+RESPONSE_SCHEMA = {
+    "win_probability": {
+        "win_probability": "number 0-100",
+        "base_case_probability": "number",
+        "evidence_contribution": "number",
+        "strategy_contribution": "number"
+    },
+    "outcome_analysis": {
+        "outcome_category": "string",
+        "outcome_description": "string",
+        "key_positive_factors": ["string"],
+        "key_negative_factors": ["string"],
+        "judicial_considerations": ["string"]
+    },
+    "evidence_analysis": {
+        "evidence_items": [{
+            "description": "string",
+            "type": "string",
+            "strength_score": "number",
+            "category": "string",
+            "improvement_suggestions": ["string"]
+        }],
+        "overall_score": "number",
+        "overall_category": "string",
+        "portfolio_gaps": ["string"],
+        "portfolio_strengths": ["string"]
+    },
+    "strategy_analysis": {
+        "primary_strategy": "string",
+        "secondary_strategy": "string",
+        "strategy_scores": "object",
+        "strategy_balance": "string",
+        "strategy_gaps": ["string"],
+        "strategy_effectiveness": "string"
+    },
+    "similar_cases": [{
+        "title": "string",
+        "similarity": "number",
+        "outcome": "string",
+        "key_factors": ["string"],
+        "evidence_strength": "string",
+        "strategy_used": "string"
+    }],
+    "recommendations": [{
+        "category": "string",
+        "priority": "Critical|High|Moderate|Enhancement",
+        "recommendation": "string",
+        "rationale": "string"
+    }]
+}
+
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens in a text
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@functools.lru_cache(maxsize=1)
+def preamble():
+    """
+    Instructions and response schema shared by every analysis prompt.
+
+    Built once per process, and always the same leading text, so requests
+    share an identical prefix.
+    """
+    schema = json.dumps(RESPONSE_SCHEMA, separators=(",", ":"))
+    return (
+        "You are a legal expert AI specialized in analyzing legal cases and predicting outcomes. "
+        "Analyze the case, evidence and legal strategy below. Predict the win probability (0-100), "
+        "outcome factors, evidence strengths/weaknesses and improvements, strategy strengths/gaps, "
+        "comparable cases, judicial considerations, and strategic recommendations ordered by priority.\n"
+        "Evidence lines are \"n. [R<reliability>/V<relevance>, 1-5] description\".\n"
+        f"Reply with only a JSON object of this shape:\n{schema}\n"
+    )
+
+
+def _truncate(text, max_chars):
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    if max_chars <= 3:
+        return text[:max_chars]
+    return text[:max_chars - 3].rstrip() + "..."
+
+
+def compact_evidence(evidence, max_tokens):
+    """
+    One line per evidence item, stopping when the token budget is used up
+    """
+    lines = []
+    used = 0
+    for number, item in enumerate(evidence, start=1):
+        line = (f"{number}. [R{item.get('reliability', '?')}/V{item.get('relevance', '?')}] "
+                f"{_truncate(str(item.get('description', '')), MAX_EVIDENCE_CHARS)}")
+        tokens = estimate_tokens(line) + 1
+        if used + tokens > max_tokens and lines:
+            lines.append(f"(+{len(evidence) - number + 1} more items omitted)")
+            break
+        lines.append(line)
+        used += tokens
+    return "\n".join(lines) if lines else "(none)"
+
+
+def fit_facts(facts, max_tokens):
+    """
+    Fit the case facts into a token budget.
+
+    Oversized facts keep whole sentences from the start (where pleadings set
+    out the parties and claims) and the end (relief sought, latest events),
+    with a marker for what was left out.
+    """
+    facts = facts.strip()
+    if estimate_tokens(facts) <= max_tokens:
+        return facts
+
+    sentences = list(iter_sentences(facts))
+    head_budget = max_tokens * 2 // 3
+    head, tail = [], []
+    used = 0
+    start = 0
+    while start < len(sentences) and used + estimate_tokens(sentences[start]) + 1 <= head_budget:
+        used += estimate_tokens(sentences[start]) + 1
+        head.append(sentences[start])
+        start += 1
+    end = len(sentences)
+    while end > start and used + estimate_tokens(sentences[end - 1]) + 1 <= max_tokens - 10:
+        used += estimate_tokens(sentences[end - 1]) + 1
+        tail.insert(0, sentences[end - 1])
+        end -= 1
+
+    # A single sentence larger than the budget is cut
+    if not head and not tail:
+        return _truncate(facts, max(0, max_tokens - 10) * CHARS_PER_TOKEN)
+    omitted = end - start
+    parts = [". ".join(head) + "."] if head else []
+    if omitted:
+        parts.append(f"[... {omitted} sentences omitted ...]")
+    if tail:
+        parts.append(". ".join(tail) + ".")
+    return " ".join(parts)
+
+
+def build_prompt(case_details, user_evidence, user_strategy, max_tokens=DEFAULT_PROMPT_TOKENS):
+    """
+    Assemble the analysis prompt within a token budget.
+
+    Evidence and strategy get fixed shares of the budget left after the
+    preamble; the facts get the rest.
+    """
+    if isinstance(case_details, dict):
+        facts = str(case_details.get("facts", ""))
+        header = "\n".join(f"{label}: {case_details[key]}" for key, label in (("title", "Title"), ("type", "Type"))
+                           if case_details.get(key))
+    else:
+        facts, header = str(case_details), ""
+
+    available = max(0, max_tokens - estimate_tokens(preamble()) - estimate_tokens(header) - 20)
+    evidence_text = compact_evidence(user_evidence, int(available * EVIDENCE_SHARE))
+    strategy_text = _truncate(str(user_strategy), int(available * STRATEGY_SHARE) * CHARS_PER_TOKEN)
+    facts_budget = available - estimate_tokens(evidence_text) - estimate_tokens(strategy_text)
+    facts_text = fit_facts(facts, facts_budget)
+
+    case_section = f"{header}\n{facts_text}" if header else facts_text
+    return (f"{preamble()}\n## Case\n{case_section}\n\n## Evidence\n{evidence_text}\n\n"
+            f"## Strategy\n{strategy_text}\n")
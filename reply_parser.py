@@ -0,0 +1,256 @@
+import json
+
+
+class IncrementalJsonParser:
+    """
+    Incremental parser for a streamed JSON object.
+
+    Text is fed in arbitrary chunks; each top-level member of the outermost
+    object is returned as a (key, value) pair as soon as its value is
+    complete, without waiting for the rest of the reply. Text before the
+    opening brace (e.g. a Markdown code fence, or prose with stray braces) is
+    skipped, as are members that are not valid JSON (recorded in errors).
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.member_start = None
+        self.done = False
+        self.result = {}
+        self.errors = []
+
+    def feed(self, chunk):
+        """
+        Consume a chunk of text and return the members it completed
+        """
+        self.buffer += chunk
+        completed = []
+        buffer = self.buffer
+        i = self.position
+        while i < len(buffer) and not self.done:
+            char = buffer[i]
+            if self.depth == 0:
+                # Skip everything before the opening brace. Only a brace followed by a
+                # key (or closing brace) opens the object, so braces in prose are ignored
+                if char == "{":
+                    following = buffer[i + 1:].lstrip()
+                    if not following:
+                        # Wait for the next chunk to decide
+                        break
+                    if following[0] in '"}':
+                        self.depth = 1
+                        self.member_start = i + 1
+            elif self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                if self.depth == 1:
+                    completed.extend(self._close_member(i))
+                    self.done = True
+                self.depth -= 1
+            elif char == "," and self.depth == 1:
+                completed.extend(self._close_member(i))
+                self.member_start = i + 1
+            i += 1
+        self.position = i
+        return completed
+
+    def _close_member(self, end):
+        member = self.buffer[self.member_start:end].strip()
+        if not member:
+            return []
+        # Skip a malformed member rather than losing the rest of the reply
+        try:
+            parsed = json.loads("{" + member + "}")
+        except ValueError as e:
+            self.errors.append(f"{member[:40]}...: {e}")
+            return []
+        self.result.update(parsed)
+        return list(parsed.items())
+
+
+def _largest_object(text):
+    """
+    The largest complete JSON object anywhere in text, or None
+    """
+    decoder = json.JSONDecoder()
+    best, best_length = None, 0
+    position = text.find("{")
+    while position >= 0:
+        try:
+            value, end = decoder.raw_decode(text, position)
+        except ValueError:
+            position = text.find("{", position + 1)
+            continue
+        if isinstance(value, dict) and end - position > best_length:
+            best, best_length = value, end - position
+        # Objects nested inside this one are smaller, so skip past it
+        position = text.find("{", end)
+    return best
+
+
+def repair_truncated(text, max_attempts=50):
+    """
+    Close a JSON object cut off part-way through, dropping the incomplete
+    member at the end. Returns the parsed object or None.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+    closers = []
+    in_string = escape = False
+    # Positions where the text can be cut and closed, with the closers needed there
+    cuts = []
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+            cuts.append((i + 1, "".join(reversed(closers))))
+        elif char in "}]":
+            if not closers:
+                break
+            closers.pop()
+            if not closers:
+                # Not truncated after all
+                return _loads_object(text[start:i + 1])
+            cuts.append((i + 1, "".join(reversed(closers))))
+        elif char == ",":
+            cuts.append((i, "".join(reversed(closers))))
+
+    # A reply cut inside a string value can often be kept by closing the string
+    candidates = [text[start:].rstrip() + ('"' if in_string else "") + "".join(reversed(closers))]
+    candidates.extend(text[start:position] + suffix for position, suffix in reversed(cuts[-max_attempts:]))
+    for candidate in candidates:
+        value = _loads_object(candidate)
+        if value is not None:
+            return value
+    return None
+
+
+def _loads_object(text):
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def extract_json_object(text, required_keys=()):
+    """
+    Recover the analysis object from a model reply.
+
+    Prefers the largest complete JSON object in the text (ignoring stray
+    braces in surrounding prose); if there is none, or a truncated object
+    later in the reply holds more of required_keys, the truncated object is
+    repaired instead. Returns None if nothing usable is found.
+    """
+    best = _largest_object(text)
+    best_score = len(required_keys & best.keys()) if best is not None and required_keys else 0
+    if best is not None and (not required_keys or best_score == len(required_keys)):
+        return best
+
+    # Try repairing from each opening brace, keeping the one that recovers the most
+    position = text.find("{")
+    attempts = 0
+    while position >= 0 and attempts < 20:
+        repaired = repair_truncated(text[position:])
+        if repaired is not None:
+            score = len(required_keys & repaired.keys()) if required_keys else len(repaired)
+            if best is None or score > best_score:
+                best, best_score = repaired, score
+        position = text.find("{", position + 1)
+        attempts += 1
+    return best
+
+
+def _coerce(value, schema):
+    """
+    Check value against a schema fragment in the RESPONSE_SCHEMA notation,
+    returning the (possibly coerced) value or raising ValueError
+    """
+    if isinstance(schema, dict):
+        if not isinstance(value, dict):
+            raise ValueError("expected an object")
+        coerced = dict(value)
+        for key, fragment in schema.items():
+            if key not in value:
+                raise ValueError(f"missing {key}")
+            try:
+                coerced[key] = _coerce(value[key], fragment)
+            except ValueError as e:
+                raise ValueError(f"{key}: {e}")
+        return coerced
+    if isinstance(schema, list):
+        if not isinstance(value, list):
+            raise ValueError("expected a list")
+        return [_coerce(item, schema[0]) for item in value]
+    if schema.startswith("number"):
+        if isinstance(value, bool):
+            raise ValueError("expected a number")
+        if isinstance(value, (int, float)):
+            return value
+        # Models sometimes quote numbers or add a percent sign
+        try:
+            return float(str(value).strip().rstrip("%"))
+        except ValueError:
+            raise ValueError("expected a number")
+    if schema.startswith("object"):
+        if not isinstance(value, dict):
+            raise ValueError("expected an object")
+        return value
+    if not isinstance(value, str):
+        if isinstance(value, (int, float)):
+            return str(value)
+        raise ValueError("expected a string")
+    return value
+
+
+def validate_sections(result, schema):
+    """
+    Split a parsed reply into the top-level sections that match the schema
+    and a list of errors for those that do not (missing sections included)
+    """
+    valid, errors = {}, []
+    for section, fragment in schema.items():
+        if section not in result:
+            errors.append(f"{section}: missing")
+            continue
+        try:
+            valid[section] = _coerce(result[section], fragment)
+        except ValueError as e:
+            errors.append(f"{section}: {e}")
+    return valid, errors
+
+
+def parse_analysis(text, schema):
+    """
+    The valid schema sections of a model reply; raises ValueError if there are none
+    """
+    parsed = extract_json_object(text, set(schema))
+    if parsed is None:
+        raise ValueError("No JSON object found in the reply")
+    sections, errors = validate_sections(parsed, schema)
+    if not sections:
+        raise ValueError("Reply has no valid sections (" + "; ".join(errors) + ")")
+    return sections
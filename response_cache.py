@@ -0,0 +1,163 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Location and limits of the Gemini response cache (override with environment variables)
+DEFAULT_CACHE_PATH = os.environ.get("GEMINI_CACHE_PATH", os.path.join("data", "gemini_cache.sqlite"))
+DEFAULT_TTL_SECONDS = int(os.environ.get("GEMINI_CACHE_TTL", 7 * 24 * 3600))
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_ENTRIES = 10000
+
+
+def _normalize(value):
+    """
+    Normalize inputs so cosmetic differences (whitespace, case of keys,
+    dict ordering) map to the same cache key
+    """
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value).strip()
+    return value
+
+
+def cache_key(case_details, user_evidence, user_strategy, model_name):
+    """
+    Content hash of a Gemini analysis request
+    """
+    payload = json.dumps(
+        _normalize([case_details, user_evidence, user_strategy, model_name]),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for Gemini analysis results: an in-process LRU in front of
+    a SQLite table. Entries expire after ttl seconds; each tier evicts its
+    least recently used entries once it exceeds its size limit.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL_SECONDS,
+                 memory_entries=DEFAULT_MEMORY_ENTRIES, disk_entries=DEFAULT_DISK_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        self.db = None
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            self.db.commit()
+
+    def get(self, key):
+        """
+        Return the cached result for key, or None
+        """
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                created_at, result = entry
+                if now - created_at <= self.ttl:
+                    self.memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return result
+                del self.memory[key]
+
+            if self.db is not None:
+                row = self.db.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    if now - row[1] <= self.ttl:
+                        self.db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                        self.db.commit()
+                        result = json.loads(row[0])
+                        self._remember(key, row[1], result)
+                        self.stats["disk_hits"] += 1
+                        return result
+                    self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.db.commit()
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, result):
+        """
+        Store a result in both tiers
+        """
+        now = time.time()
+        with self.lock:
+            self._remember(key, now, result)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(result), now, now)
+                )
+                count = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                if count > self.disk_entries:
+                    self.db.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                        (count - self.disk_entries,)
+                    )
+                    self.stats["evictions"] += count - self.disk_entries
+                self.db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+                self.db.commit()
+            self.stats["stores"] += 1
+
+    def _remember(self, key, created_at, result):
+        self.memory[key] = (created_at, result)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        """
+        Drop every cached entry
+        """
+        with self.lock:
+            self.memory.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM responses")
+                self.db.commit()
+
+    def hit_rate(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+
+_default_cache = None
+
+
+def get_response_cache():
+    """
+    Return the process-wide response cache
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResponseCache()
+    return _default_cache
@@ -0,0 +1,155 @@
+class SlottedResult:
+    """
+    Base for compact result types that convert to and from the JSON result schema.
+
+    Subclasses list their schema keys in FIELDS and map nested keys to result
+    types in NESTED (a one-element tuple for lists of that type, or a
+    collection type with from_list). Keys outside FIELDS, such as extra
+    sections in a Gemini reply, are kept in `extra`, and missing keys are left
+    as None and omitted again by to_dict().
+    """
+
+    __slots__ = ("extra",)
+    FIELDS = ()
+    NESTED = {}
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            setattr(self, field, values.pop(field, None))
+        self.extra = values or None
+
+    @classmethod
+    def from_dict(cls, data):
+        # Anything that is not a JSON object (or is already converted) passes through
+        if not isinstance(data, dict):
+            return data
+        values = dict(data)
+        for field, result_type in cls.NESTED.items():
+            if values.get(field) is None:
+                continue
+            if isinstance(result_type, tuple):
+                values[field] = tuple(result_type[0].from_dict(item) for item in values[field])
+            elif hasattr(result_type, "from_list"):
+                values[field] = result_type.from_list(values[field])
+            else:
+                values[field] = result_type.from_dict(values[field])
+        for field in cls.FIELDS:
+            # Store plain lists as tuples, which are smaller and shareable
+            if isinstance(values.get(field), list):
+                values[field] = tuple(values[field])
+        return cls(**values)
+
+    def to_dict(self):
+        data = {}
+        for field in self.FIELDS:
+            value = getattr(self, field)
+            if value is None:
+                continue
+            if isinstance(value, SlottedResult):
+                value = value.to_dict()
+            elif isinstance(value, Recommendations):
+                value = value.to_list()
+            elif isinstance(value, tuple):
+                value = [item.to_dict() if isinstance(item, SlottedResult) else item for item in value]
+            data[field] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        values = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.FIELDS)
+        return f"{type(self).__name__}({values})"
+
+
+class WinProbability(SlottedResult):
+    __slots__ = FIELDS = ("win_probability", "base_case_probability", "evidence_contribution",
+                          "strategy_contribution")
+
+
+class EvidenceItem(SlottedResult):
+    __slots__ = FIELDS = ("description", "type", "strength_score", "category", "improvement_suggestions")
+
+
+class EvidenceAnalysis(SlottedResult):
+    __slots__ = FIELDS = ("evidence_items", "overall_score", "overall_category", "portfolio_gaps",
+                          "portfolio_strengths")
+    NESTED = {"evidence_items": (EvidenceItem,)}
+
+
+class StrategyAnalysis(SlottedResult):
+    __slots__ = FIELDS = ("primary_strategy", "secondary_strategy", "strategy_scores", "strategy_balance",
+                          "strategy_gaps", "strategy_effectiveness")
+
+
+class OutcomeAnalysis(SlottedResult):
+    __slots__ = FIELDS = ("outcome_category", "outcome_description", "key_positive_factors",
+                          "key_negative_factors", "judicial_considerations")
+
+
+class SimilarCase(SlottedResult):
+    __slots__ = FIELDS = ("title", "facts", "outcome", "evidence_strength", "strategy_used", "key_factors",
+                          "similarity")
+
+
+class Recommendation(SlottedResult):
+    __slots__ = FIELDS = ("category", "priority", "recommendation", "rationale")
+
+
+class Recommendations:
+    """
+    Recommendations grouped by priority once, instead of re-filtering the list per group
+    """
+
+    __slots__ = ("items", "groups")
+
+    def __init__(self, items):
+        self.items = tuple(items)
+        self.groups = {}
+        for index, item in enumerate(self.items):
+            self.groups.setdefault(getattr(item, "priority", None), []).append(index)
+
+    @classmethod
+    def from_list(cls, data):
+        if isinstance(data, cls):
+            return data
+        return cls(Recommendation.from_dict(item) for item in data)
+
+    def to_list(self):
+        return [item.to_dict() for item in self.items]
+
+    def with_priority(self, *priorities):
+        """
+        Recommendations with any of the given priorities, in their original order
+        """
+        indexes = sorted(index for priority in priorities for index in self.groups.get(priority, ()))
+        return [self.items[index] for index in indexes]
+
+    def without_priority(self, *priorities):
+        others = [priority for priority in self.groups if priority not in priorities]
+        return self.with_priority(*others)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+class AnalysisResult(SlottedResult):
+    """
+    A full analysis, as returned by analyze_user_evidence_and_strategy or Gemini
+    """
+
+    __slots__ = FIELDS = ("win_probability", "outcome_analysis", "evidence_analysis", "strategy_analysis",
+                          "similar_cases", "recommendations")
+    NESTED = {
+        "win_probability": WinProbability,
+        "outcome_analysis": OutcomeAnalysis,
+        "evidence_analysis": EvidenceAnalysis,
+        "strategy_analysis": StrategyAnalysis,
+        "similar_cases": (SimilarCase,),
+        "recommendations": Recommendations
+    }
@@ -0,0 +1,152 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from prompt_builder import RESPONSE_SCHEMA, build_prompt
+from reply_parser import parse_analysis
+from response_cache import cache_key
+
+# Gemini models and ensemble weights, e.g. "gemini-pro:1,gemini-1.5-flash:0.5"
+DEFAULT_MODELS = os.environ.get("GEMINI_MODELS", "gemini-pro")
+
+# "auto" escalates uncertain or complex cases, "always" sends every case, "never" keeps to the rules
+ROUTING_MODES = ["auto", "always", "never"]
+
+# Escalation thresholds for the rule engine's result
+UNCERTAIN_MARGIN = 15          # win probability within this many points of 50
+MIN_SIMILARITY = 0.1           # best similar case is a weak match
+COMPLEX_FACT_CHARS = 6000      # long statements of facts
+COMPLEX_EVIDENCE_ITEMS = 15    # large evidence portfolios
+
+ENSEMBLE_TIMEOUT = 90.0
+
+
+def parse_model_weights(spec):
+    """
+    Parse "name[:weight], ..." into a list of (name, weight) pairs
+    """
+    models = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition(":")
+        weight = float(weight) if weight.strip() else 1.0
+        if weight > 0:
+            models.append((name.strip(), weight))
+    return models
+
+
+def escalation_reasons(rule_result, case_details, user_evidence):
+    """
+    Reasons the rule engine's answer should be checked by an LLM (empty if none)
+    """
+    reasons = []
+    probability = rule_result["win_probability"]["win_probability"]
+    if abs(probability - 50) < UNCERTAIN_MARGIN:
+        reasons.append(f"uncertain outcome ({probability}%)")
+    similar_cases = rule_result["similar_cases"]
+    if not similar_cases or similar_cases[0].get("similarity", 0) < MIN_SIMILARITY:
+        reasons.append("no close precedent")
+    if rule_result["strategy_analysis"]["primary_strategy"] == "undefined":
+        reasons.append("strategy not recognised")
+
+    facts = case_details.get("facts", "") if isinstance(case_details, dict) else str(case_details)
+    if len(facts) > COMPLEX_FACT_CHARS:
+        reasons.append("long statement of facts")
+    if len(user_evidence) > COMPLEX_EVIDENCE_ITEMS:
+        reasons.append(f"{len(user_evidence)} evidence items")
+    return reasons
+
+
+def combine_results(results, rule_result):
+    """
+    Weighted ensemble of (weight, sections) model results.
+
+    Win probability figures are weight-averaged over the models that returned
+    them; text sections come from the highest-weighted model that has them;
+    recommendations are merged across models, and anything still missing
+    comes from the rule engine.
+    """
+    results = sorted(results, key=lambda result: result[0], reverse=True)
+    combined = {}
+
+    with_probability = [(weight, sections["win_probability"]) for weight, sections in results
+                        if "win_probability" in sections]
+    if with_probability:
+        total_weight = sum(weight for weight, _ in with_probability)
+        combined["win_probability"] = {
+            field: round(sum(weight * figures[field] for weight, figures in with_probability) / total_weight, 1)
+            for field in RESPONSE_SCHEMA["win_probability"]
+        }
+
+    for section in RESPONSE_SCHEMA:
+        if section in ("win_probability", "recommendations"):
+            continue
+        for _, sections in results:
+            if section in sections:
+                combined[section] = sections[section]
+                break
+
+    recommendations, seen = [], set()
+    for _, sections in results:
+        for recommendation in sections.get("recommendations", []):
+            key = recommendation["recommendation"].strip().lower()
+            if key not in seen:
+                seen.add(key)
+                recommendations.append(recommendation)
+    if recommendations:
+        combined["recommendations"] = recommendations
+
+    for section in RESPONSE_SCHEMA:
+        combined.setdefault(section, rule_result[section])
+    return combined
+
+
+def _model_sections(model, prompt, key, cache):
+    """
+    One model's valid sections, from the cache or a fresh request
+    """
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    sections = parse_analysis(model.generate_content(prompt).text, RESPONSE_SCHEMA)
+    if cache is not None and len(sections) == len(RESPONSE_SCHEMA):
+        cache.put(key, sections)
+    return sections
+
+
+def ensemble_analysis(models, case_details, user_evidence, user_strategy, rule_result, cache=None,
+                      timeout=ENSEMBLE_TIMEOUT):
+    """
+    Query several (model, weight) pairs in parallel and combine their answers.
+
+    Returns the combined result and a dict naming the models that answered
+    and the errors of those that did not. If none answer, the rule engine's
+    result is returned unchanged.
+    """
+    prompt = build_prompt(case_details, user_evidence, user_strategy)
+    executor = ThreadPoolExecutor(max_workers=len(models))
+    futures = {}
+    for model, weight in models:
+        name = getattr(model, "model_name", "")
+        key = cache_key(case_details, user_evidence, user_strategy, name)
+        futures[executor.submit(_model_sections, model, prompt, key, cache)] = (name, weight)
+    done, not_done = wait(futures, timeout=timeout)
+    # Do not wait for models that timed out
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results, answered, errors = [], [], []
+    for future, (name, weight) in futures.items():
+        if future in not_done:
+            errors.append(f"{name}: timed out")
+        elif future.exception() is not None:
+            errors.append(f"{name}: {future.exception()}")
+        else:
+            results.append((weight, future.result()))
+            answered.append(name)
+
+    info = {"models": answered, "errors": errors}
+    if not results:
+        return rule_result, info
+    return combine_results(results, rule_result), info
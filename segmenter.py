@@ -0,0 +1,114 @@
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Abbreviations that end with a period but do not end a sentence (lower-case, without the final period)
+LEGAL_ABBREVIATIONS = {
+    "v", "vs", "inc", "corp", "ltd", "llc", "llp", "l.l.c", "bros", "assn", "ass'n", "dept", "dep't",
+    "ch", "cl", "para", "paras", "pt", "p", "pp", "fn", "n",
+    "cf", "id", "ibid", "e.g", "i.e", "etc", "al", "viz", "approx",
+    "mr", "mrs", "ms", "dr", "prof", "hon", "jr", "sr", "j", "jj", "c.j", "esq",
+    "u.s", "u.s.c", "u.s.a", "c.f.r", "f", "f.2d", "f.3d", "f.4th", "supp", "f.supp", "s.ct", "l.ed", "l.ed.2d",
+    "cal", "n.y", "cir", "dist", "ct", "r", "civ", "crim", "proc",
+    "jan", "feb", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov"
+}
+
+# Abbreviations that are also plain English words ("The dog was fed."), so they
+# only continue the sentence before a number or another citation abbreviation,
+# e.g. "No. 12-345", "Cal. App. 4th", "Sec. 5", "Fed. R. Civ. P.", "Dec. 3"
+WORD_ABBREVIATIONS = {
+    "no", "nos", "art", "arts", "app", "co", "sec", "secs", "st", "super", "rev", "stat", "ann", "fed", "reg",
+    "mar", "dec"
+}
+CITATION_ABBREVIATIONS = LEGAL_ABBREVIATIONS | WORD_ABBREVIATIONS
+
+# Candidate sentence terminators with the token before them and the text after
+BOUNDARY_PATTERN = re.compile(r"([^\s]*?)([.!?]+)([\"')\]]*)(?=\s+|$)")
+
+# Paragraphs are separated by blank lines
+PARAGRAPH_PATTERN = re.compile(r"[^\n]+(?:\n(?!\s*\n)[^\n]*)*")
+
+MAX_CACHED_PARAGRAPHS = 4096
+_paragraph_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _is_boundary(token, terminator, following):
+    """
+    Decide whether a terminator after token ends a sentence
+    """
+    if terminator != ".":
+        return True
+    word = token.lower().lstrip("(\"'[")
+    if word in LEGAL_ABBREVIATIONS:
+        return False
+    next_char = following[:1]
+    if word in WORD_ABBREVIATIONS and (next_char.isdigit() or _is_citation_token(following)):
+        return False
+    # Initials such as "J." or "A.B."
+    if re.fullmatch(r"(?:[a-z]\.)*[a-z]", word):
+        return False
+    # Continuations such as citations ("F. Supp. 2d 123") or lower-case text
+    if next_char and (next_char.isdigit() or next_char.islower() or next_char in "§(,;"):
+        return False
+    return True
+
+
+def _is_citation_token(following):
+    """
+    Whether the text after a terminator starts with an abbreviation such as "App." or "R."
+    """
+    token = following.split(None, 1)[0] if following else ""
+    return token.endswith(".") and token[:-1].lower() in CITATION_ABBREVIATIONS
+
+
+def segment_paragraph(paragraph):
+    """
+    Split one paragraph into sentences, without their final punctuation
+    """
+    sentences = []
+    start = 0
+    for match in BOUNDARY_PATTERN.finditer(paragraph):
+        following = paragraph[match.end():].lstrip()
+        if not _is_boundary(match.group(1), match.group(2), following):
+            continue
+        sentence = paragraph[start:match.start(2)].strip()
+        if sentence:
+            sentences.append(" ".join(sentence.split()))
+        start = match.end()
+    rest = paragraph[start:].strip()
+    if rest:
+        sentences.append(" ".join(rest.split()))
+    return sentences
+
+
+def _cached_segments(paragraph):
+    """
+    Segment a paragraph, reusing the result for paragraphs seen before
+    """
+    key = hashlib.blake2b(paragraph.encode("utf-8"), digest_size=16).digest()
+    with _cache_lock:
+        sentences = _paragraph_cache.get(key)
+        if sentences is not None:
+            _paragraph_cache.move_to_end(key)
+            return sentences
+
+    sentences = tuple(segment_paragraph(paragraph))
+    with _cache_lock:
+        _paragraph_cache[key] = sentences
+        while len(_paragraph_cache) > MAX_CACHED_PARAGRAPHS:
+            _paragraph_cache.popitem(last=False)
+    return sentences
+
+
+def iter_sentences(text):
+    """
+    Yield the sentences of a text paragraph by paragraph.
+
+    Paragraphs are found lazily and segmented independently, with results
+    cached by paragraph hash, so editing one paragraph of a long statement of
+    facts only re-segments that paragraph.
+    """
+    for match in PARAGRAPH_PATTERN.finditer(text):
+        yield from _cached_segments(match.group())
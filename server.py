@@ -0,0 +1,315 @@
+import os
+import json
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from batch import analyze_record, case_details_from_record, _init_worker
+from case_index import get_case_index
+from outcome_model import get_outcome_model
+
+# Server settings (override with environment variables)
+ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", os.cpu_count() or 1))
+MAX_BATCH_SIZE = int(os.environ.get("ANALYSIS_MAX_BATCH", 32))
+BATCH_WINDOW = float(os.environ.get("ANALYSIS_BATCH_WINDOW_MS", 2)) / 1000
+MAX_BODY_BYTES = int(os.environ.get("ANALYSIS_MAX_BODY_BYTES", 10 * 1024 * 1024))
+MAX_CASES_PER_REQUEST = 1000
+
+GEMINI_CONCURRENCY = int(os.environ.get("GEMINI_CONCURRENCY", 8))
+GEMINI_RATE = float(os.environ.get("GEMINI_RATE", 1.0))
+GEMINI_TIMEOUT = float(os.environ.get("GEMINI_TIMEOUT", 60.0))
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def analyze_records(records):
+    """
+    Analyze a batch of records in a worker process
+    """
+    return [analyze_record(record) for record in records]
+
+
+class MicroBatcher:
+    """
+    Group single-case requests that arrive close together into one pool task.
+
+    A batch is sent when it reaches max_batch cases or max_wait seconds after
+    its first case arrived, so one inter-process round trip serves many
+    requests under load while an idle server adds at most max_wait latency.
+    """
+
+    def __init__(self, executor, max_batch=MAX_BATCH_SIZE, max_wait=BATCH_WINDOW):
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = None
+        self.task = None
+        self.pending = set()
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+        if self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+
+    async def submit(self, record):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((record, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Dispatch without waiting so the next batch can start collecting
+            task = asyncio.create_task(self._dispatch(batch))
+            self.pending.add(task)
+            task.add_done_callback(self.pending.discard)
+
+    async def _dispatch(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, analyze_records, [record for record, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def load_gemini_model():
+    """
+    Gemini model for the /v1/analyze/gemini endpoint, or None if not configured.
+    Set GEMINI_STUB=1 to serve the local stub model instead of the API.
+    """
+    if os.environ.get("GEMINI_STUB"):
+        from gemini_async import StubGeminiModel
+        return StubGeminiModel()
+    if not os.environ.get("GEMINI_API_KEY"):
+        return None
+    import google.generativeai as genai
+    genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+    return genai.GenerativeModel(os.environ.get("GEMINI_MODEL", "gemini-pro"))
+
+
+class AnalysisService:
+    """
+    ASGI application serving the analysis engine as JSON endpoints:
+
+    GET  /health               - liveness and pool size
+    POST /v1/analyze           - one case, rule-based engine
+    POST /v1/analyze/batch     - {"cases": [...]}, rule-based engine
+    POST /v1/analyze/gemini    - one case through Gemini, falling back to the rules
+
+    Cases use the same fields as batch.py: id, title, type, facts, evidence
+    and strategy.
+    """
+
+    def __init__(self, workers=ANALYSIS_WORKERS):
+        self.workers = workers
+        self.executor = None
+        self.batcher = None
+        self.gemini_model = None
+        self.gemini_limiter = None
+        self.gemini_semaphore = None
+        self.response_cache = None
+
+    def startup(self):
+        # Load the index and model before forking so workers share their pages
+        get_case_index()
+        get_outcome_model()
+        context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=_init_worker)
+        self.batcher = MicroBatcher(self.executor)
+        self.batcher.start()
+
+        self.gemini_model = load_gemini_model()
+        if self.gemini_model is not None:
+            from gemini_async import TokenBucket
+            from response_cache import get_response_cache
+            self.gemini_limiter = TokenBucket(GEMINI_RATE)
+            self.gemini_semaphore = asyncio.Semaphore(GEMINI_CONCURRENCY)
+            self.response_cache = get_response_cache()
+
+    async def shutdown(self):
+        await self.batcher.stop()
+        self.executor.shutdown(cancel_futures=True)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.handle_http(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def handle_http(self, scope, receive, send):
+        routes = {
+            ("GET", "/health"): self.health,
+            ("POST", "/v1/analyze"): self.analyze,
+            ("POST", "/v1/analyze/batch"): self.analyze_batch,
+            ("POST", "/v1/analyze/gemini"): self.analyze_gemini
+        }
+        try:
+            handler = routes.get((scope["method"], scope["path"]))
+            if handler is None:
+                if any(path == scope["path"] for _, path in routes):
+                    raise HTTPError(405, "Method not allowed")
+                raise HTTPError(404, "Not found")
+            body = await read_json(receive) if scope["method"] == "POST" else None
+            status, payload = await handler(body)
+        except HTTPError as e:
+            status, payload = e.status, {"error": e.message}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        await send_json(send, status, payload)
+
+    async def health(self, body):
+        return 200, {"status": "ok", "workers": self.workers, "gemini": self.gemini_model is not None}
+
+    async def analyze(self, body):
+        row = await self.batcher.submit(validate_case(body))
+        if "error" in row:
+            return 500, row
+        return 200, row
+
+    async def analyze_batch(self, body):
+        cases = body.get("cases") if isinstance(body, dict) else None
+        if not isinstance(cases, list):
+            raise HTTPError(400, "Expected a JSON object with a list of cases")
+        if len(cases) > MAX_CASES_PER_REQUEST:
+            raise HTTPError(413, f"At most {MAX_CASES_PER_REQUEST} cases per request")
+        records = [validate_case(case) for case in cases]
+        rows = await asyncio.gather(*(self.batcher.submit(record) for record in records))
+        return 200, {"results": rows}
+
+    async def analyze_gemini(self, body):
+        from gemini_async import analyze_case_async
+
+        if self.gemini_model is None:
+            raise HTTPError(503, "Gemini is not configured (set GEMINI_API_KEY)")
+        record = validate_case(body)
+        case = {
+            "id": record.get("id"),
+            "case_details": case_details_from_record(record),
+            "evidence": record["evidence"],
+            "strategy": record["strategy"]
+        }
+        row = await analyze_case_async(self.gemini_model, case, self.gemini_limiter, self.gemini_semaphore,
+                                       timeout=GEMINI_TIMEOUT, cache=self.response_cache,
+                                       rule_analysis=self.rule_analysis)
+        return 200, row
+
+    async def rule_analysis(self, case_details, evidence, strategy):
+        """
+        Rule-based sections for a partial or failed Gemini reply, computed in
+        the worker pool so the event loop keeps serving other requests
+        """
+        row = await self.batcher.submit(dict(case_details, evidence=evidence, strategy=strategy))
+        if "error" in row:
+            raise HTTPError(500, row["error"])
+        return row["result"]
+
+
+def validate_case(case):
+    """
+    Check the shape of a case from a request body
+    """
+    if not isinstance(case, dict):
+        raise HTTPError(400, "Each case must be a JSON object")
+    evidence = case.get("evidence", [])
+    if not isinstance(evidence, list) or not all(isinstance(item, dict) for item in evidence):
+        raise HTTPError(400, "evidence must be a list of objects")
+    for item in evidence:
+        if "description" not in item or "reliability" not in item or "relevance" not in item:
+            raise HTTPError(400, "Each evidence item needs description, reliability and relevance")
+        if not isinstance(item["description"], str):
+            raise HTTPError(400, "Evidence descriptions must be strings")
+        for rating in ("reliability", "relevance"):
+            value = item[rating]
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not 1 <= value <= 5:
+                raise HTTPError(400, f"Evidence {rating} must be a number from 1 to 5")
+    if not isinstance(case.get("strategy", ""), str) or not isinstance(case.get("facts", ""), str):
+        raise HTTPError(400, "facts and strategy must be strings")
+    return dict(case, evidence=evidence, strategy=case.get("strategy", ""))
+
+
+async def read_json(receive):
+    """
+    Read and decode a JSON request body
+    """
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            break
+    try:
+        return json.loads(b"".join(chunks) or b"null")
+    except ValueError:
+        raise HTTPError(400, "Request body is not valid JSON")
+
+
+async def send_json(send, status, payload):
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+app = AnalysisService()
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the case analysis engine over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    # One event loop process feeding the worker pool; scale with ANALYSIS_WORKERS
+    uvicorn.run("server:app", host=args.host, port=args.port, log_level="info")
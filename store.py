@@ -0,0 +1,277 @@
+import os
+import json
+import time
+import queue
+import sqlite3
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+# Where analyses are stored, as scheme://location (override with ANALYSIS_STORE_URL)
+DEFAULT_STORE_URL = os.environ.get("ANALYSIS_STORE_URL", "sqlite:///" + os.path.join("data", "analyses.sqlite"))
+POOL_SIZE = 4
+
+
+class AnalysisStore(ABC):
+    """
+    Interface for persisting cases, their evidence portfolios and analysis results.
+
+    A record is a dict with case (title, type, facts), evidence (list of
+    evidence dicts), strategy, result (analysis dict) and optionally source
+    (e.g. "rules", "gemini", "ensemble"). Backends implement the abstract
+    methods, register themselves with register_backend() and are opened by
+    URL with open_store().
+    """
+
+    @abstractmethod
+    def save_analyses(self, records):
+        """
+        Store many records in one batch, returning their analysis ids
+        """
+        raise NotImplementedError
+
+    def save_analysis(self, record):
+        return self.save_analyses([record])[0]
+
+    @abstractmethod
+    def get_analysis(self, analysis_id):
+        """
+        A stored record with its id and created_at, or None
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_analyses(self, case_type=None, since=None, limit=100):
+        """
+        Summaries of stored analyses, newest first, without the full results
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def summary(self, since=None):
+        """
+        Count and average win probability per case type
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of SQLite connections shared between threads
+    """
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.connections = queue.Queue()
+        for _ in range(size):
+            connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            # WAL lets readers (dashboards) run while a writer commits
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self.connections.put(connection)
+        self.size = size
+
+    @contextmanager
+    def connection(self):
+        connection = self.connections.get()
+        try:
+            with connection:
+                yield connection
+        finally:
+            self.connections.put(connection)
+
+    def close(self):
+        for _ in range(self.size):
+            self.connections.get().close()
+
+
+class SQLiteStore(AnalysisStore):
+    """
+    Reference backend: one SQLite file with cases, evidence and analyses tables.
+
+    Headline figures (case type, win probability, outcome category) are kept
+    in their own indexed columns, so listings and dashboards never parse the
+    stored result JSON.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cases (
+            id INTEGER PRIMARY KEY,
+            title TEXT,
+            case_type TEXT,
+            facts TEXT,
+            strategy TEXT,
+            created_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS evidence (
+            case_id INTEGER NOT NULL REFERENCES cases(id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            description TEXT NOT NULL,
+            reliability INTEGER,
+            relevance INTEGER,
+            source TEXT,
+            PRIMARY KEY (case_id, position)
+        );
+        CREATE TABLE IF NOT EXISTS analyses (
+            id INTEGER PRIMARY KEY,
+            case_id INTEGER NOT NULL REFERENCES cases(id) ON DELETE CASCADE,
+            case_type TEXT,
+            source TEXT,
+            win_probability REAL,
+            outcome_category TEXT,
+            result TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS cases_type_created ON cases (case_type, created_at);
+        CREATE INDEX IF NOT EXISTS analyses_type_created ON analyses (case_type, created_at);
+        CREATE INDEX IF NOT EXISTS analyses_created ON analyses (created_at);
+        CREATE INDEX IF NOT EXISTS analyses_case ON analyses (case_id);
+    """
+
+    def __init__(self, path, pool_size=POOL_SIZE):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.pool = ConnectionPool(path, pool_size)
+        with self.pool.connection() as connection:
+            connection.executescript(self.SCHEMA)
+
+    def save_analyses(self, records):
+        if not records:
+            return []
+        now = time.time()
+        with self.pool.connection() as connection:
+            # Take the write lock first, then number the new rows so every
+            # table can be filled with a single executemany
+            connection.execute("BEGIN IMMEDIATE")
+            first_case = connection.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM cases").fetchone()[0]
+            first_analysis = connection.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM analyses").fetchone()[0]
+            case_rows, evidence_rows, analysis_rows = [], [], []
+            for offset, record in enumerate(records):
+                case = record.get("case", {})
+                case_id = first_case + offset
+                case_rows.append((case_id, case.get("title", ""), case.get("type", ""), case.get("facts", ""),
+                                  record.get("strategy", ""), now))
+                evidence_rows.extend(
+                    (case_id, position, item["description"], item.get("reliability"), item.get("relevance"),
+                     item.get("source"))
+                    for position, item in enumerate(record.get("evidence", []))
+                )
+                result = record["result"]
+                analysis_rows.append((
+                    first_analysis + offset, case_id, case.get("type", ""), record.get("source", "rules"),
+                    result.get("win_probability", {}).get("win_probability"),
+                    result.get("outcome_analysis", {}).get("outcome_category"),
+                    json.dumps(result), now
+                ))
+            connection.executemany(
+                "INSERT INTO cases (id, title, case_type, facts, strategy, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                case_rows)
+            connection.executemany(
+                "INSERT INTO evidence (case_id, position, description, reliability, relevance, source) "
+                "VALUES (?, ?, ?, ?, ?, ?)", evidence_rows)
+            connection.executemany(
+                "INSERT INTO analyses (id, case_id, case_type, source, win_probability, outcome_category, result, "
+                "created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", analysis_rows)
+        return [row[0] for row in analysis_rows]
+
+    def get_analysis(self, analysis_id):
+        with self.pool.connection() as connection:
+            row = connection.execute(
+                "SELECT a.id, a.case_id, a.source, a.result, a.created_at, c.title, c.case_type, c.facts, c.strategy "
+                "FROM analyses a JOIN cases c ON c.id = a.case_id WHERE a.id = ?", (analysis_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            evidence = connection.execute(
+                "SELECT description, reliability, relevance, source FROM evidence WHERE case_id = ? ORDER BY position",
+                (row[1],)
+            ).fetchall()
+        return {
+            "id": row[0],
+            "case": {"title": row[5], "type": row[6], "facts": row[7]},
+            "evidence": [_evidence_item(*item) for item in evidence],
+            "strategy": row[8],
+            "source": row[2],
+            "result": json.loads(row[3]),
+            "created_at": row[4]
+        }
+
+    def list_analyses(self, case_type=None, since=None, limit=100):
+        query = ("SELECT a.id, c.title, a.case_type, a.source, a.win_probability, a.outcome_category, a.created_at "
+                 "FROM analyses a JOIN cases c ON c.id = a.case_id")
+        conditions, parameters = _filters(case_type, since)
+        if conditions:
+            query += " WHERE " + " AND ".join(f"a.{condition}" for condition in conditions)
+        query += " ORDER BY a.created_at DESC, a.id DESC LIMIT ?"
+        with self.pool.connection() as connection:
+            rows = connection.execute(query, parameters + [limit]).fetchall()
+        return [dict(zip(("id", "title", "case_type", "source", "win_probability", "outcome_category",
+                          "created_at"), row)) for row in rows]
+
+    def summary(self, since=None):
+        query = "SELECT case_type, COUNT(*), AVG(win_probability) FROM analyses"
+        conditions, parameters = _filters(None, since)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " GROUP BY case_type ORDER BY COUNT(*) DESC"
+        with self.pool.connection() as connection:
+            rows = connection.execute(query, parameters).fetchall()
+        return [{"case_type": row[0], "analyses": row[1], "average_win_probability": row[2]} for row in rows]
+
+    def close(self):
+        self.pool.close()
+
+
+def _filters(case_type, since):
+    conditions, parameters = [], []
+    if case_type is not None:
+        conditions.append("case_type = ?")
+        parameters.append(case_type)
+    if since is not None:
+        conditions.append("created_at >= ?")
+        parameters.append(since)
+    return conditions, parameters
+
+
+def _evidence_item(description, reliability, relevance, source):
+    item = {"description": description, "reliability": reliability, "relevance": relevance}
+    if source is not None:
+        item["source"] = source
+    return item
+
+
+STORE_BACKENDS = {"sqlite": SQLiteStore}
+
+
+def register_backend(scheme, store_class):
+    """
+    Make an AnalysisStore implementation available to open_store() under a URL scheme
+    """
+    STORE_BACKENDS[scheme] = store_class
+
+
+def open_store(url=DEFAULT_STORE_URL):
+    """
+    Open a store from a URL such as sqlite:///data/analyses.sqlite
+    """
+    scheme, separator, location = url.partition("://")
+    if not separator or scheme not in STORE_BACKENDS:
+        raise ValueError(f"Unsupported analysis store URL: {url}")
+    # sqlite:///relative/path and sqlite:////absolute/path, as in SQLAlchemy
+    return STORE_BACKENDS[scheme](location[1:] if location.startswith("/") else location)
+
+
+_default_store = None
+
+
+def get_store():
+    """
+    Return the process-wide store, opening it on first use
+    """
+    global _default_store
+    if _default_store is None:
+        _default_store = open_store()
+    return _default_store
@@ -0,0 +1,56 @@
+import random
+
+import pandas as pd
+import pytest
+
+from keywords import EVIDENCE_TYPE_KEYWORDS, STRATEGY_KEYWORDS, KeywordMatcher
+from main import assess_evidence_portfolios, assess_evidence_strength, evidence_portfolio_results
+
+# Keywords, keyword prefixes and overlaps ("recording" contains "record"), plus filler
+WORDS = sorted({keyword for _, keywords in EVIDENCE_TYPE_KEYWORDS + STRATEGY_KEYWORDS for keyword in keywords}
+               | {"records", "Reporter", "EMAIL", "reco", "witnessed", "counterclaim", "the", "of", "signed",
+                  "damaged", "pallet", "court", "-", "  "})
+
+
+def random_text(rng, max_words=8):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, max_words)))
+
+
+def random_portfolio(rng):
+    return [{"description": random_text(rng), "reliability": rng.randint(1, 5), "relevance": rng.randint(1, 5)}
+            for _ in range(rng.randint(0, 8))]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_vectorized_scoring_matches_per_item_scoring(seed):
+    rng = random.Random(seed)
+    portfolios = {f"p{i}": random_portfolio(rng) for i in range(10000)}
+    evidence = pd.DataFrame([dict(item, portfolio_id=key) for key, items in portfolios.items() for item in items])
+
+    items, portfolio = assess_evidence_portfolios(evidence, portfolios=list(portfolios))
+    results = evidence_portfolio_results(items, portfolio)
+
+    for key, portfolio_items in portfolios.items():
+        assert results[key] == assess_evidence_strength(portfolio_items), key
+
+
+def reference_counts(table, text, word_boundary):
+    text = text.lower()
+    if word_boundary:
+        import re
+        return {category: sum(1 for keyword in keywords if re.search(rf"\b{re.escape(keyword)}\b", text))
+                for category, keywords in table}
+    return {category: sum(1 for keyword in keywords if keyword in text) for category, keywords in table}
+
+
+@pytest.mark.parametrize("word_boundary", [False, True])
+@pytest.mark.parametrize("table", [EVIDENCE_TYPE_KEYWORDS, STRATEGY_KEYWORDS])
+def test_keyword_matcher_matches_per_keyword_scan(table, word_boundary):
+    rng = random.Random(0)
+    matcher = KeywordMatcher(table, word_boundary=word_boundary)
+    for _ in range(30000):
+        text = random_text(rng, 12)
+        expected = reference_counts(table, text, word_boundary)
+        assert matcher.counts(text) == expected, text
+        assert matcher.first_match(text, "other") == next(
+            (category for category, count in expected.items() if count > 0), "other")
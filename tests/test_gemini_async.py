@@ -0,0 +1,93 @@
+import re
+import time
+
+import pytest
+
+import gemini_async
+from gemini_async import StubGeminiModel, analyze_cases
+from prompt_builder import RESPONSE_SCHEMA
+
+PARTIAL_SECTIONS = [section for section in RESPONSE_SCHEMA if section != "win_probability"]
+
+
+def make_cases(count):
+    return [{"id": f"case-{i}",
+             "case_details": {"title": f"case-{i}", "type": "Civil", "facts": "The carrier delivered the goods late."},
+             "evidence": [{"description": "Signed delivery contract", "reliability": 4, "relevance": 5}],
+             "strategy": "Negotiate a settlement"} for i in range(count)]
+
+
+class ScriptedStubModel(StubGeminiModel):
+    """
+    Stub whose replies follow a per-case script of "quota", "error" and "ok"
+    """
+
+    def __init__(self, scripts, latencies):
+        super().__init__(latency=0, quota_error_rate=0, error_rate=0)
+        self.scripts = scripts
+        self.latencies = latencies
+        self.attempts = {case_id: [] for case_id in scripts}
+
+    async def generate_content_async(self, prompt):
+        case_id = re.search(r"Title: (case-\d+)", prompt).group(1)
+        self.attempts[case_id].append(time.monotonic())
+        await gemini_async.asyncio.sleep(self.latencies[case_id])
+        outcome = self.scripts[case_id][len(self.attempts[case_id]) - 1]
+        if outcome == "quota":
+            raise RuntimeError("429 Resource has been exhausted (e.g. check quota).")
+        if outcome == "error":
+            raise RuntimeError("500 Internal error")
+        return await super().generate_content_async(prompt)
+
+
+def test_retries_backoff_fallbacks_and_order(monkeypatch):
+    # No jitter, so the backoff before retry n is exactly backoff * 2 ** n
+    monkeypatch.setattr(gemini_async.random, "random", lambda: 0.0)
+    backoff = 0.05
+    scripts = {
+        "case-0": ["quota", "quota", "ok"],
+        "case-1": ["error"],
+        "case-2": ["quota", "quota", "quota"],
+        "case-3": ["ok"]
+    }
+    # Later cases answer first, so completion order differs from input order
+    model = ScriptedStubModel(scripts, {"case-0": 0.03, "case-1": 0.02, "case-2": 0.01, "case-3": 0.0})
+
+    rows = analyze_cases(model, make_cases(4), concurrency=4, rate=1000, max_retries=2, backoff=backoff)
+
+    assert [row["id"] for row in rows] == ["case-0", "case-1", "case-2", "case-3"]
+    assert {case_id: len(attempts) for case_id, attempts in model.attempts.items()} == {
+        "case-0": 3, "case-1": 1, "case-2": 3, "case-3": 1}
+    for case_id in ("case-0", "case-2"):
+        attempts = model.attempts[case_id]
+        for retry, (previous, current) in enumerate(zip(attempts, attempts[1:])):
+            assert current - previous >= 0.9 * backoff * 2 ** retry
+
+    assert [row["source"] for row in rows] == ["gemini", "fallback", "fallback", "gemini"]
+    assert rows[1]["error"] == "RuntimeError: 500 Internal error"
+    assert rows[2]["error"].startswith("RuntimeError: 429")
+    for row in rows:
+        assert set(row["result"]) >= set(RESPONSE_SCHEMA)
+    for row in (rows[0], rows[3]):
+        # The stub only answers win_probability; the rule engine fills the rest
+        assert row["filled_sections"] == PARTIAL_SECTIONS
+        assert row["result"]["win_probability"]["win_probability"] == 50.0
+
+
+def test_random_stub_failures_keep_every_case():
+    model = StubGeminiModel(latency=0.005, quota_error_rate=0.3, error_rate=0.1, seed=3)
+    cases = make_cases(30)
+
+    rows = analyze_cases(model, cases, concurrency=8, rate=1000, max_retries=3, backoff=0.001)
+
+    assert [row["id"] for row in rows] == [case["id"] for case in cases]
+    sources = [row["source"] for row in rows]
+    assert set(sources) == {"gemini", "fallback"}
+    # Quota errors were retried, so the stub saw more calls than cases
+    assert model.calls > len(cases)
+    for row in rows:
+        assert set(row["result"]) >= set(RESPONSE_SCHEMA)
+        if row["source"] == "fallback":
+            assert row["error"].startswith("RuntimeError:")
+        else:
+            assert row["filled_sections"] == PARTIAL_SECTIONS
@@ -0,0 +1,9 @@
+from golden import check_ann_reproducible, check_golden
+
+
+def test_golden_outputs_match():
+    assert check_golden() == []
+
+
+def test_ann_index_rebuilds_identically():
+    assert check_ann_reproducible(size=500, queries=10)
@@ -0,0 +1,104 @@
+import json
+
+from ingest import DEFAULT_EVIDENCE_RATING, ingest_documents, read_evidence_table, validate_evidence_table
+
+
+def _validate(name, data):
+    return validate_evidence_table(read_evidence_table((name, data)))
+
+
+def test_json_null_and_missing_fields_are_rejected():
+    rows = [
+        {"description": "Signed contract", "reliability": 4, "relevance": 5},
+        {"description": None, "reliability": 3, "relevance": 3},
+        {"reliability": 3, "relevance": 3},
+        {"description": "Witness statement", "reliability": None},
+        {"description": "Invoice", "reliability": 2, "relevance": 3, "source": None}
+    ]
+    valid, errors = _validate("evidence.json", json.dumps(rows).encode())
+
+    assert valid["description"].tolist() == ["Signed contract", "Invoice"]
+    assert valid["source"].tolist() == ["", ""]
+    # JSON records have no heading row, so the first record is row 1
+    assert errors == [
+        "row 2: missing description",
+        "row 3: missing description",
+        "row 4: reliability must be 1-5; relevance must be 1-5"
+    ]
+
+
+def test_csv_blank_and_missing_fields_are_rejected():
+    data = (b"Exhibit,Reliability,Relevance\n"
+            b"Signed contract,4,5\n"
+            b",3,3\n"
+            b"Witness statement,,4\n"
+            b"Expert report,high,4\n")
+    valid, errors = _validate("evidence.csv", data)
+
+    assert valid.to_dict("records") == [{"description": "Signed contract", "reliability": 4, "relevance": 5}]
+    assert errors == [
+        "row 3: missing description",
+        "row 4: reliability must be 1-5",
+        "row 5: reliability must be 1-5"
+    ]
+
+
+def test_missing_rating_columns_use_the_default():
+    valid, errors = _validate("evidence.csv", b"description\nSigned contract\n")
+
+    assert valid.to_dict("records") == [{"description": "Signed contract", "reliability": 3, "relevance": 3}]
+    assert errors == []
+
+
+def make_pdf(pages):
+    """
+    A minimal PDF with one line of Helvetica text per page
+    """
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>",
+               "<< /Type /Pages /Kids [%s] /Count %d >>" % (
+                   " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages))), len(pages)),
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    for i, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return pdf
+
+
+def test_pdf_pages_are_read_in_order_with_exhibits():
+    pdf = make_pdf(["The carrier delivered late.", "Exhibit A: Signed contract", "The buyer refused payment."])
+    progress = []
+    result = ingest_documents([("claim.pdf", pdf)], workers=2,
+                              progress=lambda name, page, count: progress.append((name, page, count)))
+
+    assert progress == [("claim.pdf", 1, 3), ("claim.pdf", 2, 3), ("claim.pdf", 3, 3)]
+    assert result["pages"] == 3
+    assert result["facts"].split("\n\n") == [
+        "The carrier delivered late.", "Exhibit A: Signed contract", "The buyer refused payment."]
+    assert result["evidence"] == [{"description": "Exhibit A: Signed contract (claim.pdf, p. 2)",
+                                   "reliability": DEFAULT_EVIDENCE_RATING,
+                                   "relevance": DEFAULT_EVIDENCE_RATING, "source": "claim.pdf"}]
+    assert not result["truncated"]
+
+
+def test_form_feed_pages_and_truncation():
+    text = b"First page of facts.\fEXHIBIT 12 - Invoice\fThird page of facts."
+    result = ingest_documents([("notes.txt", text), ("memo.txt", b"A memo without exhibits.")], max_fact_chars=30)
+
+    assert result["pages"] == 4
+    assert result["facts"] == "First page of facts.\n\nEXHIBIT 12"
+    assert result["truncated"]
+    assert [item["description"] for item in result["evidence"]] == [
+        "Exhibit 12: Invoice (notes.txt, p. 2)", "Document: memo.txt"]
+    assert {(item["reliability"], item["relevance"]) for item in result["evidence"]} == {
+        (DEFAULT_EVIDENCE_RATING, DEFAULT_EVIDENCE_RATING)}
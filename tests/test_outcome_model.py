@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from main import assess_evidence_strength, categorize_strategy, extract_case_facts
+from outcome_model import is_win, outcome_text, train_from_file
+
+WON_FACTS = "The carrier signed the contract and delivered late. The invoice shows the agreed delivery date."
+LOST_FACTS = "The tenant gave no notice and no records were kept. The landlord relied on an oral agreement."
+
+
+@pytest.mark.parametrize("outcome, won", [
+    ("Win at trial", True),
+    ("Favorable ruling", True),
+    ("Successful appeal", True),
+    ("Unfavorable verdict", False),
+    ("Unfavorable ruling", False),
+    ("Loss on appeal", False),
+    ("Settled", False),
+    (True, True),
+    (0, False)
+])
+def test_is_win_labels(outcome, won):
+    assert is_win(outcome) is won
+
+
+def test_trained_model_contributions_sum_to_win_probability(tmp_path):
+    path = tmp_path / "cases.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(12):
+            if i % 2:
+                case = {"facts": WON_FACTS, "strategy": "File a motion for summary judgment",
+                        "evidence": [{"description": "Signed contract", "reliability": 5, "relevance": 5},
+                                     {"description": "Expert report on damages", "reliability": 4, "relevance": 4}],
+                        "outcome": "Favorable ruling" if i % 4 == 1 else "Win at trial"}
+            else:
+                case = {"facts": LOST_FACTS, "strategy": "Negotiate a settlement",
+                        "evidence": [{"description": "Witness statement", "reliability": 2, "relevance": 2}],
+                        "outcome": "Unfavorable verdict" if i % 4 == 0 else "Unfavorable ruling"}
+            f.write(json.dumps(case) + "\n")
+
+    model = train_from_file(str(path))
+    assert list(model.classifier.classes_) == [0, 1]
+
+    strong = model.predict(outcome_text(extract_case_facts(WON_FACTS), "File a motion for summary judgment"),
+                           assess_evidence_strength([{"description": "Signed contract", "reliability": 5,
+                                                      "relevance": 5}]),
+                           categorize_strategy("File a motion for summary judgment"))
+    weak = model.predict(outcome_text(extract_case_facts(LOST_FACTS), "Negotiate a settlement"),
+                         assess_evidence_strength([{"description": "Witness statement", "reliability": 2,
+                                                    "relevance": 2}]),
+                         categorize_strategy("Negotiate a settlement"))
+    for prediction in (strong, weak):
+        parts = (prediction["base_case_probability"] + prediction["evidence_contribution"]
+                 + prediction["strategy_contribution"])
+        assert parts == pytest.approx(prediction["win_probability"])
+        assert 0 <= prediction["win_probability"] <= 100
+    # "Unfavorable" cases are labelled as losses, so they must score below the wins
+    assert strong["win_probability"] > weak["win_probability"]
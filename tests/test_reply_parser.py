@@ -0,0 +1,32 @@
+import json
+
+from prompt_builder import RESPONSE_SCHEMA
+from reply_parser import IncrementalJsonParser, parse_analysis
+
+ANALYSIS = {
+    "win_probability": {"win_probability": 99, "base_case_probability": 60, "evidence_contribution": 20,
+                        "strategy_contribution": 19},
+    "recommendations": [{"category": "Evidence", "priority": "High", "recommendation": "Add an expert",
+                         "rationale": "No expert evidence"}]
+}
+
+
+def _feed(parser, text, size):
+    members = []
+    for start in range(0, len(text), size):
+        members.extend(parser.feed(text[start:start + size]))
+    return members
+
+
+def test_stream_parser_skips_braces_in_prose():
+    text = "Here is the analysis {as requested}: " + json.dumps(ANALYSIS)
+    for size in (1, 7, len(text)):
+        parser = IncrementalJsonParser()
+        members = dict(_feed(parser, text, size))
+        assert parser.done
+        assert members == ANALYSIS
+
+
+def test_parse_analysis_skips_braces_in_prose():
+    text = "Here is the analysis {as requested}: " + json.dumps(ANALYSIS)
+    assert parse_analysis(text, RESPONSE_SCHEMA)["win_probability"]["win_probability"] == 99
@@ -0,0 +1,31 @@
+from segmenter import segment_paragraph
+
+
+def test_plain_words_end_sentences():
+    assert segment_paragraph("I said no. Then he left.") == ["I said no", "Then he left"]
+    assert segment_paragraph("She studied art. The gallery closed. He built an app. It failed.") == [
+        "She studied art", "The gallery closed", "He built an app", "It failed"]
+
+
+def test_numbered_abbreviations_continue_before_a_number():
+    assert segment_paragraph("See Case No. 12-345 and Nos. 6 and 7. Art. 5 applies.") == [
+        "See Case No. 12-345 and Nos. 6 and 7", "Art. 5 applies"]
+    assert segment_paragraph("Jones v. Smith, 45 Cal. App. 4th 12 (1996). The court agreed.") == [
+        "Jones v. Smith, 45 Cal. App. 4th 12 (1996)", "The court agreed"]
+
+
+def test_word_like_abbreviations_end_sentences():
+    assert segment_paragraph("The dog was fed. Then it slept.") == ["The dog was fed", "Then it slept"]
+    assert segment_paragraph("The party was super. Everyone came.") == ["The party was super", "Everyone came"]
+    assert segment_paragraph("It took one sec. Then it exploded.") == ["It took one sec", "Then it exploded"]
+    assert segment_paragraph("They met in Dec. She left in Mar. He stayed.") == [
+        "They met in Dec", "She left in Mar", "He stayed"]
+
+
+def test_word_like_abbreviations_continue_in_citations():
+    assert segment_paragraph("Acme Co. v. Jones, 12 Fed. Reg. 345 (Dec. 3, 2019). The court agreed.") == [
+        "Acme Co. v. Jones, 12 Fed. Reg. 345 (Dec. 3, 2019)", "The court agreed"]
+    assert segment_paragraph("Under Fed. R. Civ. P. 12 and Sec. 5 of the Act. It applies.") == [
+        "Under Fed. R. Civ. P. 12 and Sec. 5 of the Act", "It applies"]
+    assert segment_paragraph("See Cal. Super. Ct. R. 8 and Rev. Stat. Ann. 4. Done.") == [
+        "See Cal. Super. Ct. R. 8 and Rev. Stat. Ann. 4", "Done"]
@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from store import AnalysisStore, open_store
+
+
+def record(i, case_type="Civil"):
+    return {
+        "case": {"title": f"Case {i}", "type": case_type, "facts": "The carrier damaged the goods."},
+        "evidence": [{"description": "Signed contract", "reliability": 5, "relevance": 4},
+                     {"description": "Witness statement", "reliability": 2, "relevance": 3, "source": "notes.pdf"}],
+        "strategy": "Negotiate a settlement",
+        "result": {"win_probability": {"win_probability": 40.0 + i}, "outcome_analysis": {"outcome_category": "x"}},
+        "source": "rules"
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = open_store(f"sqlite:///{tmp_path}/analyses.sqlite")
+    yield store
+    store.close()
+
+
+def test_incomplete_backend_fails_on_creation():
+    class PartialStore(AnalysisStore):
+        def save_analyses(self, records):
+            return []
+
+    with pytest.raises(TypeError):
+        PartialStore()
+
+
+def test_bulk_save_round_trips(store):
+    ids = store.save_analyses([record(i, "Tax" if i % 2 else "Civil") for i in range(10)])
+    assert ids == list(range(1, 11))
+    assert store.save_analysis(record(10)) == 11
+
+    saved = store.get_analysis(4)
+    assert saved["case"] == {"title": "Case 3", "type": "Tax", "facts": "The carrier damaged the goods."}
+    assert saved["evidence"] == record(3)["evidence"]
+    assert saved["result"] == record(3)["result"]
+    assert [row["id"] for row in store.list_analyses(case_type="Tax", limit=3)] == [10, 8, 6]
+    assert {row["case_type"]: row["analyses"] for row in store.summary()} == {"Civil": 6, "Tax": 5}
+
+
+def test_concurrent_bulk_saves_get_distinct_ids(store):
+    ids = []
+
+    def save():
+        ids.extend(store.save_analyses([record(i) for i in range(50)]))
+
+    threads = [threading.Thread(target=save) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(ids) == list(range(1, 201))
+    assert all(len(store.get_analysis(i)["evidence"]) == 2 for i in (1, 100, 200))